@@ -13,4 +13,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "cms_project.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from content.events import EVENTS_PATH, events_app  # Once the app registry is ready
+
+
+async def application(scope, receive, send):
+    # Live content events are streamed outside Django's request cycle
+    if scope['type'] == 'http' and scope['path'] == EVENTS_PATH:
+        return await events_app(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,109 @@
+"""
+Sampled traffic capture for replay (see `manage.py replay_traffic`).
+
+With TRAFFIC_CAPTURE_FILE set, `TrafficCaptureMiddleware` appends one JSON
+line per sampled request (TRAFFIC_CAPTURE_SAMPLE_RATE). A line holds:
+- timestamp, method, path, route and raw query string
+- status and duration
+- a body summary: content type, size, JSON keys, form field names and
+  upload sizes (never the values)
+- a pseudonymous user alias derived from the token's user id
+
+Those are enough to rebuild the request mix without storing content or
+credentials.
+"""
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import RawPostDataException
+from django.http.multipartparser import MultiPartParserError
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+
+def user_alias(request):
+    """
+    A stable pseudonym for the requesting user, or None if unauthenticated.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        user_id = authentication.get_validated_token(raw_token).get(jwt_settings.USER_ID_CLAIM)
+    except (InvalidToken, TokenError):
+        return None
+    digest = hmac.new(settings.SECRET_KEY.encode(), str(user_id).encode(), hashlib.sha256)
+    return digest.hexdigest()[:12]
+
+
+def body_summary(request):
+    content_type = request.content_type or ''
+    summary = {'content_type': content_type, 'size': int(request.META.get('CONTENT_LENGTH') or 0)}
+    if content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'null')
+        except ValueError:
+            return summary
+        if isinstance(data, dict):
+            summary['keys'] = sorted(data)
+        elif isinstance(data, list):
+            summary['items'] = len(data)
+            summary['keys'] = sorted({key for item in data if isinstance(item, dict) for key in item})
+    elif content_type == 'multipart/form-data':
+        # Parsed by the view already, so this reads no extra bytes
+        try:
+            summary['keys'] = sorted(request.POST)
+            summary['files'] = {name: upload.size for name, upload in request.FILES.items()}
+        except (RawPostDataException, MultiPartParserError):
+            pass
+    return summary
+
+
+class TrafficCaptureMiddleware:
+    """
+    Record sampled requests to TRAFFIC_CAPTURE_FILE as JSON lines.
+    """
+
+    def __init__(self, get_response):
+        self.path = getattr(settings, 'TRAFFIC_CAPTURE_FILE', None)
+        if not self.path:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'TRAFFIC_CAPTURE_SAMPLE_RATE', 0.01)
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        timestamp = time.time()
+        start = time.perf_counter()
+        # Read the body up front; views that stream it would leave nothing to summarize
+        summary = body_summary(request) if request.content_type == 'application/json' else None
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        record = {
+            'ts': round(timestamp, 3),
+            'method': request.method,
+            'path': request.path,
+            'route': '/' + match.route if match else None,
+            'query': request.META.get('QUERY_STRING', ''),
+            'body': summary or body_summary(request),
+            'user': user_alias(request),
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+        }
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self.lock, open(self.path, 'a') as file:
+            file.write(line)
+        return response
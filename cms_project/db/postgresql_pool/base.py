@@ -0,0 +1,116 @@
+"""
+PostgreSQL backend with a per-process connection pool.
+
+Django's persistent connections (CONN_MAX_AGE) keep one connection per
+thread, which under ASGI (a thread per sync_to_async call) or with many
+worker threads means many idle server connections. This backend instead
+shares up to POOL['SIZE'] connections between the threads of a process:
+closing a Django connection hands it back to the pool, and opening one takes
+an idle connection (checked with `SELECT 1` if it sat idle a while) or opens
+a new one. When all are in use, callers wait up to POOL['TIMEOUT'] seconds.
+"""
+import threading
+import time
+
+from django.db import DatabaseError
+from django.db.backends.postgresql import base
+
+HEALTH_CHECK_AFTER = 30  # Seconds idle before a pooled connection is checked on checkout
+
+_pools = {}
+_pools_guard = threading.Lock()
+
+
+class PoolExhausted(DatabaseError):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, size, timeout):
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(size)
+        self.idle = []  # (connection, isolation level, idle since), most recent last
+        self.lock = threading.Lock()
+
+    def get(self, connect, is_usable):
+        """
+        An idle connection, or a new one from `connect()`. Returns the
+        connection and the isolation level stored with it.
+        """
+        if not self.slots.acquire(timeout=self.timeout):
+            raise PoolExhausted(f'No database connection free within {self.timeout} seconds.')
+        try:
+            while True:
+                with self.lock:
+                    entry = self.idle.pop() if self.idle else None
+                if entry is None:
+                    return connect()
+                connection, isolation_level, idle_since = entry
+                if connection.closed:
+                    continue
+                if time.monotonic() - idle_since < HEALTH_CHECK_AFTER or is_usable(connection):
+                    return connection, isolation_level
+                self.discard(connection)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def put(self, connection, isolation_level):
+        try:
+            # Ends any transaction left open; a no-op in autocommit mode
+            connection.rollback()
+        except Exception:
+            self.discard(connection)
+        else:
+            with self.lock:
+                self.idle.append((connection, isolation_level, time.monotonic()))
+        finally:
+            self.slots.release()
+
+    def discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def close_idle(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for connection, _, _ in idle:
+            self.discard(connection)
+
+
+def get_pool(alias, settings_dict):
+    with _pools_guard:
+        if alias not in _pools:
+            options = settings_dict.get('POOL', {})
+            _pools[alias] = ConnectionPool(options.get('SIZE', 10), options.get('TIMEOUT', 10))
+        return _pools[alias]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        def connect():
+            connection = super(DatabaseWrapper, self).get_new_connection(conn_params)
+            return connection, self.isolation_level
+
+        connection, self.isolation_level = get_pool(self.alias, self.settings_dict).get(connect, self._is_usable)
+        return connection
+
+    def _is_usable(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except self.Database.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None:
+            return
+        pool = get_pool(self.alias, self.settings_dict)
+        if self.connection.closed:
+            # Broken or closed by the server; free its slot
+            pool.slots.release()
+        else:
+            pool.put(self.connection, self.isolation_level)
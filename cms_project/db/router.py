@@ -0,0 +1,66 @@
+"""
+Primary/replica routing.
+
+Reads go to the primary unless wrapped in `replica_reads()`, as the content
+list and detail GET handlers are. Inside such a block, reads are spread over
+the DATABASE_REPLICAS aliases, except:
+- after a write in the same block, so a request reads its own writes
+- inside a transaction on the primary
+Writes and migrations always go to the primary.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_routing = ContextVar('db_routing', default=None)
+
+
+class ReplicaReads:
+    __slots__ = ('replicas', 'wrote')
+
+    def __init__(self, replicas):
+        self.replicas = replicas
+        self.wrote = False
+
+
+def get_replicas():
+    return list(getattr(settings, 'DATABASE_REPLICAS', ()))
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Let reads in the block use a replica. With `enabled` false the block
+    stays on the primary (e.g. right after the user wrote).
+    """
+    token = _routing.set(ReplicaReads(get_replicas() if enabled else []))
+    try:
+        yield
+    finally:
+        _routing.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or routing.wrote or not routing.replicas:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(routing.replicas)
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
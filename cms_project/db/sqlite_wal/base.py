@@ -0,0 +1,161 @@
+"""
+SQLite backend tuned for concurrent use on a single node.
+
+Every new connection switches the database to write-ahead logging, so
+readers no longer block on a writer (or a writer on readers), and sets the
+PRAGMAS below. Entries in the database's 'PRAGMAS' setting override them.
+
+Writes go through one writer per database file and process:
+- `atomic` blocks start with BEGIN IMMEDIATE, taking the write lock up
+  front. With a deferred BEGIN, a transaction that reads and then writes
+  fails with "database is locked" as soon as another writer commits first,
+  whatever the busy timeout.
+- Before that, and around single writes outside a transaction, threads queue
+  on an in-process lock instead of polling SQLite's busy handler.
+Transactions are therefore all treated as writes; read-only ones still hold
+the lock, so keep them short. Other processes are waited for through
+busy_timeout.
+
+In-memory databases (the test database) have no WAL; their connections
+share one cache with table-level locks, which fail at once instead of
+waiting. Pragmas under the database's TEST 'PRAGMAS' are added while the
+test database is in use; `database_from_url()` sets `read_uncommitted` there
+so that readers take no table locks, leaving only writers, which are already
+serialized, to lock.
+
+An INSERT ... RETURNING outside a transaction stays open until its row is
+fetched, so the lock is held until then rather than until execute returns.
+"""
+import threading
+
+from django.db.backends.sqlite3 import base, creation, operations
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',  # Durable across crashes of the process; only an OS crash can lose the last commits
+    'busy_timeout': 5000,  # Milliseconds to wait for other processes' locks
+    'cache_size': -20000,  # Pages cached per connection; negative is KiB (20 MB)
+    'mmap_size': 268435456,  # 256 MB of the file read through memory mapping
+    'temp_store': 'MEMORY',
+}
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+_writer_locks = {}
+_writer_locks_guard = threading.Lock()
+
+
+def get_writer_lock(name):
+    with _writer_locks_guard:
+        return _writer_locks.setdefault(str(name), threading.RLock())
+
+
+def serialize_writes(execute, sql, params, many, context):
+    """
+    Execute wrapper running writes outside a transaction under the writer lock.
+    """
+    connection = context['connection']
+    connection.finish_returning()  # A RETURNING statement before this one has finished
+    if connection.in_atomic_block or not sql.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+        return execute(sql, params, many, context)
+    connection.writer_lock.acquire()
+    try:
+        result = execute(sql, params, many, context)
+    except BaseException:
+        connection.writer_lock.release()
+        raise
+    if ' RETURNING ' in sql.upper():
+        connection.returning_pending = True
+    else:
+        connection.writer_lock.release()
+    return result
+
+
+class DatabaseOperations(operations.DatabaseOperations):
+    def fetch_returned_insert_columns(self, cursor, returning_params):
+        try:
+            return super().fetch_returned_insert_columns(cursor, returning_params)
+        finally:
+            self.connection.finish_returning()
+
+    def fetch_returned_insert_rows(self, cursor):
+        try:
+            return super().fetch_returned_insert_rows(cursor)
+        finally:
+            self.connection.finish_returning()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def create_test_db(self, *args, **kwargs):
+        settings_dict = self.connection.settings_dict
+        self.saved_pragmas = settings_dict.get('PRAGMAS')
+        test_pragmas = settings_dict['TEST'].get('PRAGMAS')
+        if test_pragmas:
+            settings_dict['PRAGMAS'] = {**(self.saved_pragmas or {}), **test_pragmas}
+        return super().create_test_db(*args, **kwargs)
+
+    def destroy_test_db(self, *args, **kwargs):
+        try:
+            super().destroy_test_db(*args, **kwargs)
+        finally:
+            settings_dict = self.connection.settings_dict
+            if getattr(self, 'saved_pragmas', None) is None:
+                settings_dict.pop('PRAGMAS', None)
+            else:
+                settings_dict['PRAGMAS'] = self.saved_pragmas
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+    ops_class = DatabaseOperations
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer_lock = None  # Set on connecting; test setup may still change NAME
+        self.holds_writer_lock = False
+        self.returning_pending = False
+        self.execute_wrappers.append(serialize_writes)
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        self.writer_lock = get_writer_lock(self.settings_dict['NAME'])
+        pragmas = {**PRAGMAS, **self.settings_dict.get('PRAGMAS', {})}
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.ensure_connection()
+        self.writer_lock.acquire()
+        self.holds_writer_lock = True
+        try:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self.release_writer_lock()
+            raise
+
+    def release_writer_lock(self):
+        if self.holds_writer_lock:
+            self.holds_writer_lock = False
+            self.writer_lock.release()
+
+    def finish_returning(self):
+        if self.returning_pending:
+            self.returning_pending = False
+            self.writer_lock.release()
+
+    def _commit(self):
+        super()._commit()
+        self.release_writer_lock()
+
+    def _rollback(self):
+        try:
+            super()._rollback()
+        finally:
+            self.release_writer_lock()
+
+    def _close(self):
+        try:
+            super()._close()
+        finally:
+            self.finish_returning()
+            self.release_writer_lock()
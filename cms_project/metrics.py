@@ -0,0 +1,245 @@
+"""
+Per-request performance instrumentation.
+
+`RequestMetricsMiddleware` times every request and breaks it down into:
+- db: number of SQL queries and time spent in them (via an execute wrapper)
+- auth: time spent in DRF authentication
+- serialize: time spent in serializers and rendering the response body
+- total: the whole request
+
+Each response gets a `Server-Timing` header, and the timings are collected
+into per-route histograms served in the Prometheus text format by
+`metrics_view` (/metrics/, for METRICS_TOKEN or staff). Histograms are kept in
+process memory, so every worker process exposes its own series.
+"""
+import bisect
+import hmac
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+# Upper bounds in seconds; queries are counted with QUERY_BUCKETS.
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('queries', 'db', 'auth', 'serialize')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = self.auth = self.serialize = 0.0
+
+
+@contextmanager
+def timed(phase):
+    """
+    Add the time spent in the block to `phase` ('auth' or 'serialize') of the
+    current request. Does nothing outside an instrumented request.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        setattr(timings, phase, getattr(timings, phase) + time.perf_counter() - start)
+
+
+def record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.queries += 1
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# Connections are per thread; new ones (including those the async ORM opens in
+# its worker thread) pick the recorder up here, existing ones in the middleware.
+connection_created.connect(install_query_recorder)
+
+
+class Histogram:
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """
+    Histograms per (metric, method, route).
+    """
+    METRICS = {
+        'cms_request_duration_seconds': ('Total request time', DURATION_BUCKETS),
+        'cms_request_db_seconds': ('Time spent in SQL queries', DURATION_BUCKETS),
+        'cms_request_db_queries': ('SQL queries per request', QUERY_BUCKETS),
+        'cms_request_auth_seconds': ('Time spent in DRF authentication', DURATION_BUCKETS),
+        'cms_request_serialize_seconds': ('Time spent serializing and rendering', DURATION_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, method, route, values):
+        with self._lock:
+            for name, value in values.items():
+                key = (name, method, route)
+                histogram = self._series.get(key)
+                if histogram is None:
+                    histogram = self._series[key] = Histogram(self.METRICS[name][1])
+                histogram.observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        lines = []
+        with self._lock:
+            series = sorted(self._series.items())
+            for name, (help_text, _) in self.METRICS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (metric, method, route), histogram in series:
+                    if metric != name:
+                        continue
+                    labels = f'method="{method}",route="{escape_label(route)}"'
+                    cumulative = 0
+                    for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{labels}}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class RequestMetricsMiddleware:
+    """
+    Time each request; see the module docstring. Works under WSGI and ASGI.
+    Place it first in MIDDLEWARE so `total` covers the other middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    def process_template_response(self, request, response):
+        # DRF responses render after the view returns; count that as serialization.
+        timings = _current.get()
+        if timings is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                timings.serialize += time.perf_counter() - start
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, timings, total):
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries"',
+            f'auth;dur={timings.auth * 1000:.2f}',
+            f'serialize;dur={timings.serialize * 1000:.2f}',
+            f'total;dur={total * 1000:.2f}',
+        ])
+        match = request.resolver_match
+        if match is not None and match.func is not metrics_view:
+            registry.observe(request.method, '/' + match.route, {
+                'cms_request_duration_seconds': total,
+                'cms_request_db_seconds': timings.db,
+                'cms_request_db_queries': timings.queries,
+                'cms_request_auth_seconds': timings.auth,
+                'cms_request_serialize_seconds': timings.serialize,
+            })
+        return response
+
+
+def can_scrape(request):
+    """
+    Whether `request` carries `Authorization: Bearer <METRICS_TOKEN>` or the
+    credentials of a staff user (an API token or a session).
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if token and hmac.compare_digest(header.encode(), f'Bearer {token}'.encode()):
+        return True
+    if getattr(request, 'user', None) is not None and request.user.is_staff:
+        return True
+    api_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        return api_request.user.is_staff
+    except APIException:
+        return False
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. The client address says nothing behind a
+    proxy, so scrapers authenticate with METRICS_TOKEN; staff may look too.
+    """
+    if not can_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -24,6 +24,8 @@ import os
 from pathlib import Path
 from datetime import timedelta
 
+from cms_project.db import databases_from_env
+
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -59,6 +61,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "cms_project.metrics.RequestMetricsMiddleware",  # Server-Timing header and /metrics/ histograms
+    "cms_project.capture.TrafficCaptureMiddleware",  # Off unless TRAFFIC_CAPTURE_FILE is set
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -70,6 +74,13 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "cms_project.urls"
 
+# Sampled request capture for `manage.py replay_traffic` (JSON lines; disabled when unset)
+TRAFFIC_CAPTURE_FILE = os.environ.get('TRAFFIC_CAPTURE_FILE') or None
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.environ.get('TRAFFIC_CAPTURE_SAMPLE_RATE', '0.01'))
+
+# Bearer token for scraping /metrics/ (staff users may read it too; unset: staff only)
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -91,12 +102,16 @@ WSGI_APPLICATION = "cms_project.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
-    }
-}
+# DATABASE_URL (default: the SQLite file below) and optional DATABASE_REPLICA_URLS,
+# DATABASE_CONN_MAX_AGE (seconds, default 60) and DATABASE_POOL_SIZE (PostgreSQL;
+# 0 keeps Django's persistent connections instead of a pool). See cms_project/db.
+DATABASES = databases_from_env(os.environ, f'sqlite:///{BASE_DIR / "db.sqlite3"}')
+DATABASE_ROUTERS = ['cms_project.db.router.PrimaryReplicaRouter']
+# Aliases that content list/detail reads may use; empty sends everything to the primary
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Seconds a user's (and staff) reads stay on the primary after they write: the
+# replica lag the router assumes, and how long cached responses are built from the primary
+DATABASE_REPLICA_LAG = float(os.environ.get('DATABASE_REPLICA_LAG', '5'))
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -143,8 +158,10 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Rest Framework Configurations
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',  # JWT without a user query per request
     ],
+    # For faster JSON output, put 'content.renderers.UJSONRenderer' first in
+    # 'DEFAULT_RENDERER_CLASSES' (same bytes as DRF's JSONRenderer)
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,  # Number of items per page
 }
@@ -158,4 +175,60 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),     # Refresh token expires in 7 days
     'ROTATE_REFRESH_TOKENS': True,  # Optional: Rotates refresh token upon use
     'BLACKLIST_AFTER_ROTATION': True,  # Optional: Blacklists used refresh tokens
-}
\ No newline at end of file
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.TokenRefreshSerializer',
+}
+# Blacklist checks use an in-process bloom filter rebuilt this often (seconds);
+# 0 queries the database on every check. Prune old rows with `manage.py prune_tokens`.
+TOKEN_BLACKLIST_FILTER_INTERVAL = 30
+# In-process cache of User rows for authentication and views needing the full row
+USER_CACHE_SIZE = 1024  # Users kept per process; 0 disables the cache
+USER_CACHE_TIMEOUT = 60  # Seconds before a cached row is re-read (bounds cross-process staleness)
+
+# Cache configuration (content list/detail responses are cached here). locmem
+# is per process: with several workers, use a shared backend (Redis, Memcached)
+# or writes in one worker leave the others serving stale responses.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'cms-default',
+    }
+}
+# Seconds to keep content responses; 0 disables the cache. None: 300 with a
+# shared CACHES backend, off with a per-process one (see content/cache.py).
+CONTENT_CACHE_TIMEOUT = None
+
+# Document downloads (/api/content/<pk>/document/): None streams through Django;
+# 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx) hands the file to the proxy
+CONTENT_DOCUMENT_SENDFILE = None
+CONTENT_DOCUMENT_ACCEL_PREFIX = '/protected-media/'  # nginx `internal` location aliased to MEDIA_ROOT
+
+# Background text extraction and previews for uploaded PDFs: 'process' (worker pool),
+# 'inline' (synchronously after commit) or 'off'
+CONTENT_EXTRACTION_MODE = 'process'
+CONTENT_EXTRACTION_WORKERS = 2
+CONTENT_EXTRACTION_MAX_ATTEMPTS = 3
+CONTENT_PREVIEW_WIDTH = 200  # Pixels; first-page thumbnails need PyMuPDF
+
+# Deleted and replaced documents are queued and their files released in batches
+# after commit: 'thread' (background thread), 'inline' (on commit) or 'off'
+# (only `manage.py drain_document_deletions`). See content/deletion.py.
+CONTENT_DOCUMENT_GC_MODE = 'thread'
+CONTENT_DOCUMENT_GC_DELAY = 1.0  # Seconds the thread waits so a cascade is drained at once
+CONTENT_DOCUMENT_GC_BATCH_SIZE = 500  # Queue entries released per transaction
+CONTENT_DOCUMENT_GC_MAX_ATTEMPTS = 5
+
+# Bulk content API
+CONTENT_BULK_MAX_ITEMS = 1000  # Operations accepted per /api/content/bulk/ request
+
+# Change feed (/api/content/changes/): changes are held back this many seconds so
+# late-committing writes aren't skipped; deletions are kept for CONTENT_TOMBSTONE_DAYS
+CONTENT_CHANGES_SETTLE = 2.0
+CONTENT_TOMBSTONE_DAYS = 30  # Older `since` cursors get 410 Gone; see `manage.py prune_tombstones`
+
+# Live content events (GET /api/content/events/, ASGI only; see content/events.py)
+CONTENT_EVENTS_BROADCASTER = 'content.events.LocalBroadcaster'  # In-process; swap for a cross-process one
+CONTENT_EVENTS_HEARTBEAT = 15  # Seconds between keepalive comments
+CONTENT_EVENTS_QUEUE_SIZE = 1000  # Events a slow client may lag behind before it is disconnected
+
+# Serve content list/detail reads with native async views (run under ASGI, e.g. uvicorn)
+CONTENT_ASYNC_VIEWS = os.environ.get('CONTENT_ASYNC_VIEWS', '') == '1'
@@ -18,11 +18,13 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from cms_project.metrics import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path('api/users/', include('users.urls')), # User URLs
     path('api/content/', include('content.urls')),  # content URLs
+    path('metrics/', metrics_view, name='metrics'),  # Prometheus scrape endpoint (METRICS_TOKEN or staff)
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
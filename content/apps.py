@@ -1,6 +1,26 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+def ensure_search_index(sender, using, **kwargs):
+    """
+    Re-create the SQLite FTS triggers if a migration remade the content table.
+    """
+    from django.db import connections
+    from . import search
+
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        if 'content_content' in connection.introspection.table_names(cursor):
+            search.install_sqlite_index(cursor)
 
 
 class ContentConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "content"
+
+    def ready(self):
+        from . import checks  # noqa: F401 (registers the system checks)
+        post_migrate.connect(ensure_search_index, sender=self)
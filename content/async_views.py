@@ -0,0 +1,158 @@
+"""
+Native async read endpoints for ASGI deployments.
+
+With CONTENT_ASYNC_VIEWS enabled, GET on the content list and detail URLs is
+served by these coroutines using the async ORM (`acount`, `afirst`, async
+iteration), so one ASGI worker can hold many slow clients without a thread
+each. Writes on the same URLs still go to the DRF views in a worker thread.
+Responses are byte-for-byte the ones the sync views produce, and both share
+the response cache.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from cms_project.db.router import replica_reads
+from cms_project.metrics import timed
+from users.authentication import ClaimsJWTAuthentication
+from . import cache as content_cache
+from .models import Content
+from .pagination import AsyncPageNumberPagination, KeysetPagination
+from .serializers import ContentRowSerializer, ContentSerializer, get_fieldset
+from .views import (
+    ContentDetailView, ContentListCreateView, category_facet_rows, conditional_response, detail_queryset,
+    is_conditional, list_queryset, list_rows, version_headers,
+)
+
+
+def get_renderer():
+    # The first JSON renderer configured for DRF, so UJSONRenderer applies here too
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        if issubclass(renderer_class, JSONRenderer):
+            return renderer_class()
+    return JSONRenderer()
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    with timed('serialize'):
+        body = get_renderer().render(data)
+    return HttpResponse(body, status=status_code, content_type='application/json', headers=headers)
+
+
+async def authenticate(request):
+    """
+    The JWTAuthentication checks, with any user lookup done through the async ORM.
+    """
+    authentication = ClaimsJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        raise exceptions.NotAuthenticated()
+    return await authentication.aget_user(authentication.get_validated_token(raw_token))
+
+
+def read_view(handler, sync_view):
+    """
+    Serve GET/HEAD with the async `handler` and everything else with the
+    regular DRF view, turning API errors into the same JSON DRF would send.
+    """
+    sync_view = sync_to_async(sync_view)
+
+    async def view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await sync_view(request, *args, **kwargs)
+        try:
+            drf_request = Request(request)
+            with timed('auth'):
+                drf_request.user = await authenticate(request)
+            return await handler(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            headers = None
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                headers = {'WWW-Authenticate': 'Bearer realm="api"'}
+            detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+            return json_response(detail, exc.status_code, headers)
+
+    view.csrf_exempt = True
+    return view
+
+
+async def list_data(request):
+    # `?cursor=` opts into keyset pagination: no COUNT(*) and no OFFSET scan
+    if 'cursor' in request.query_params:
+        paginator = KeysetPagination()
+    else:
+        paginator = AsyncPageNumberPagination()
+
+    contents = list_queryset(request)
+    rows, fields = list_rows(request, contents)
+    result_page = await paginator.apaginate_queryset(rows, request)
+    with timed('serialize'):
+        data = paginator.get_paginated_response(ContentRowSerializer(result_page, fields=fields).data).data
+
+    # Category counts over the whole filtered listing, not just this page
+    if request.query_params.get('facets') in ('1', 'true'):
+        data['facets'] = {'categories': [
+            {'name': row['category__name'], 'count': row['count']}
+            async for row in category_facet_rows(contents)
+        ]}
+    return data
+
+
+async def content_list(request):
+    key = content_cache.make_key('list', request)
+    with replica_reads(await content_cache.areplica_allowed(request.user)):
+        data = await content_cache.aget_or_build(key, lambda: list_data(request))
+    return json_response(data)
+
+
+async def detail_data(pk, user, fields=None):
+    content = await detail_queryset(Content.objects.filter(pk=pk), fields).afirst()
+    # Admin can access all; authors can only access their own content
+    if content is None or not (user.is_staff or content.author_id == user.pk):
+        return None
+    with timed('serialize'):
+        return {'updated_at': content.updated_at, 'data': ContentSerializer(content, fields=fields).data}
+
+
+async def get_version(pk, user):
+    contents = Content.objects.filter(pk=pk)
+    if not user.is_staff:
+        contents = contents.filter(author_id=user.pk)
+    return await contents.values_list('updated_at', flat=True).afirst()
+
+
+def conditional_json_response(request, updated_at):
+    response = conditional_response(request, updated_at)
+    if response is not None and response.status_code == status.HTTP_412_PRECONDITION_FAILED:
+        return json_response(response.data, response.status_code, version_headers(updated_at))
+    return response
+
+
+async def content_detail(request, pk):
+    key = content_cache.make_key('detail', request, pk)
+    fields = get_fieldset(request)
+    with replica_reads(await content_cache.areplica_allowed(request.user)):
+        entry = await content_cache.aget_cached(key)
+        if entry is None and is_conditional(request):
+            # Revalidate from one column before building the body
+            updated_at = await get_version(pk, request.user)
+            if updated_at is None:
+                return json_response({"detail": "Not found or unauthorized."}, status.HTTP_404_NOT_FOUND)
+            not_modified = conditional_json_response(request, updated_at)
+            if not_modified is not None:
+                return not_modified
+        if entry is None:
+            entry = await content_cache.aget_or_build(key, lambda: detail_data(pk, request.user, fields))
+    if entry is None:
+        return json_response({"detail": "Not found or unauthorized."}, status.HTTP_404_NOT_FOUND)
+    return conditional_json_response(request, entry['updated_at']) or json_response(
+        entry['data'], headers=version_headers(entry['updated_at']),
+    )
+
+
+content_list_view = read_view(content_list, ContentListCreateView.as_view())
+content_detail_view = read_view(content_detail, ContentDetailView.as_view())
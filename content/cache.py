@@ -0,0 +1,261 @@
+"""
+Server-side cache for content list and detail responses.
+
+Cache keys embed two version numbers: a global one and one for the scope the
+response was built for (an author's own content, or `all` for staff). Writes
+bump the author's version and `all`, so stale entries are simply never read
+again and age out; nothing has to enumerate or delete keys.
+
+Concurrent misses for the same key are coalesced: threads in one process
+queue on a per-key lock, and processes sharing the cache back off while the
+holder of a short-lived `add()` lock rebuilds the entry.
+
+Versions, and the read-your-writes markers of `mark_written`, only reach
+the processes that share the cache. With a per-process backend (locmem, the
+default) a write in one worker leaves every other worker serving its old
+entries, so the cache is off unless CONTENT_CACHE_TIMEOUT is set, and the
+`content.W001`/`content.W002` checks warn about per-process setups.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+GLOBAL_VERSION_KEY = 'content:version:global'
+ALL_SCOPE = 'all'
+LOCK_TIMEOUT = 10  # seconds a rebuild may hold the cross-process lock
+WAIT_INTERVAL = 0.05
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+_pending_builds = {}  # key -> Future of the build running in this event loop
+
+
+def get_cache():
+    return caches[getattr(settings, 'CONTENT_CACHE_ALIAS', 'default')]
+
+
+DEFAULT_TIMEOUT = 300
+# Backends whose entries, and so invalidations, live in one process
+LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def is_shared():
+    """Whether the cache is shared by every process (Redis, Memcached, a database...)."""
+    alias = getattr(settings, 'CONTENT_CACHE_ALIAS', 'default')
+    return settings.CACHES[alias]['BACKEND'] not in LOCAL_BACKENDS
+
+
+def get_timeout():
+    """
+    Seconds to keep entries; a falsy value disables the cache. Unset (None),
+    DEFAULT_TIMEOUT with a shared backend, off with a per-process one.
+    """
+    timeout = getattr(settings, 'CONTENT_CACHE_TIMEOUT', None)
+    if timeout is None:
+        return DEFAULT_TIMEOUT if is_shared() else 0
+    return timeout
+
+
+def scope_for(user):
+    return ALL_SCOPE if user.is_staff else f'author:{user.pk}'
+
+
+def _version_key(scope):
+    return f'content:version:{scope}'
+
+
+def _bump(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing or evicted: restart from a clock value, so the new version
+        # can never collide with one that old entries were stored under.
+        cache.add(key, time.time_ns(), None)
+
+
+def _versions(scope):
+    cache = get_cache()
+    keys = [GLOBAL_VERSION_KEY, _version_key(scope)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_content_versions(author_id):
+    """
+    Invalidate everything cached for `author_id` and for staff.
+    Bumps now and again on commit, so a read racing the open transaction
+    can't keep pre-commit data under the new version.
+    """
+    def bump():
+        _bump(_version_key(f'author:{author_id}'))
+        _bump(_version_key(ALL_SCOPE))
+        if settings.DATABASE_REPLICAS:
+            mark_written(f'author:{author_id}', ALL_SCOPE)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def _written_key(scope):
+    return f'content:written:{scope}'
+
+
+def mark_written(*scopes):
+    """
+    Note that `scopes` changed just now. For DATABASE_REPLICA_LAG seconds
+    their reads go to the primary, so neither the author nor the response
+    cache (under the new version) sees a replica that hasn't caught up.
+    """
+    get_cache().set_many(dict.fromkeys(map(_written_key, scopes), 1), settings.DATABASE_REPLICA_LAG)
+
+
+def replica_allowed(user):
+    """Whether content reads for `user` may go to a replica."""
+    return bool(settings.DATABASE_REPLICAS) and get_cache().get(_written_key(scope_for(user))) is None
+
+
+async def areplica_allowed(user):
+    return bool(settings.DATABASE_REPLICAS) and await get_cache().aget(_written_key(scope_for(user))) is None
+
+
+def invalidate_all():
+    """Invalidate every cached content response (e.g. after changing the response shape)."""
+    _bump(GLOBAL_VERSION_KEY)
+
+
+def make_key(kind, request, *parts):
+    scope = scope_for(request.user)
+    global_version, scope_version = _versions(scope)
+    # Host and query string both shape the response (absolute pagination links, filters).
+    params = sorted(request.query_params.lists())
+    digest = hashlib.sha256(repr((request.get_host(), params, parts)).encode()).hexdigest()
+    return f'content:{kind}:{global_version}:{scope_version}:{scope}:{digest}'
+
+
+@contextmanager
+def _local_lock(key):
+    with _local_locks_guard:
+        entry = _local_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _local_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _local_locks[key]
+
+
+def get_cached(key):
+    """The cached value for `key`, or None (also when the cache is disabled)."""
+    return get_cache().get(key) if get_timeout() else None
+
+
+async def aget_cached(key):
+    return await get_cache().aget(key) if get_timeout() else None
+
+
+def get_or_build(key, build):
+    """
+    Return the cached value for `key`, calling `build()` on a miss.
+    `build()` returning None means "don't cache" (e.g. not found).
+    """
+    timeout = get_timeout()
+    if not timeout:
+        return build()
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    with _local_lock(key):
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f'{key}:lock'
+        if not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            # Another process is rebuilding this entry; wait for it to land.
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(WAIT_INTERVAL)
+                value = cache.get(key)
+                if value is not None:
+                    return value
+                if cache.add(lock_key, 1, LOCK_TIMEOUT):
+                    break
+            else:
+                return build()
+
+        try:
+            value = build()
+            if value is not None:
+                cache.set(key, value, timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+
+async def aget_or_build(key, build):
+    """
+    `get_or_build` for async views, where `build` is a coroutine function.
+    Concurrent misses in this event loop await the one running build instead
+    of blocking a thread; other processes are held off by the same lock key.
+    """
+    timeout = get_timeout()
+    if not timeout:
+        return await build()
+    cache = get_cache()
+    value = await cache.aget(key)
+    if value is not None:
+        return value
+
+    pending = _pending_builds.get(key)
+    if pending is not None:
+        value = await asyncio.shield(pending)
+        return value if value is not None else await build()
+
+    future = asyncio.get_running_loop().create_future()
+    _pending_builds[key] = future
+    lock_key = f'{key}:lock'
+    value = None
+    try:
+        if not await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+            # Another process is rebuilding this entry; wait for it to land.
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                await asyncio.sleep(WAIT_INTERVAL)
+                value = await cache.aget(key)
+                if value is not None:
+                    return value
+                if await cache.aadd(lock_key, 1, LOCK_TIMEOUT):
+                    break
+            else:
+                value = await build()
+                return value
+        try:
+            value = await build()
+            if value is not None:
+                await cache.aset(key, value, timeout)
+        finally:
+            await cache.adelete(lock_key)
+        return value
+    finally:
+        # Waiters get the value, or None on failure and then build for themselves
+        future.set_result(value)
+        del _pending_builds[key]
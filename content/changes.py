@@ -0,0 +1,145 @@
+"""
+Delta-sync change feed for offline clients.
+
+`GET /api/content/changes/?since=<cursor>` returns the content created or
+updated after the cursor, read from the (author, updated_at, id) and
+(updated_at, id) indexes, and the ids deleted since then, read from
+`ContentTombstone` rows written next to the other post_delete handling (and
+for the previous author when an item is reassigned; staff feeds, which
+still carry the item, skip those). Both streams are merged in time order
+with tombstones first, so an id is only deleted in a feed after its last
+change there and a client applies `deleted` before `changed`, however the
+pages are cut, then stores `cursor` for the next sync. `since` may also be
+an ISO 8601 `updated_at`; without it the feed starts from scratch.
+
+Changes newer than CONTENT_CHANGES_SETTLE seconds are held back until the
+next sync, so a write committed late by a slow transaction, with an earlier
+`updated_at`, isn't skipped. Tombstones are kept CONTENT_TOMBSTONE_DAYS
+days (`manage.py prune_tombstones`); older cursors get 410 Gone and the
+client starts over. Writes that skip the signals (`QuerySet.update()`, raw
+SQL) don't show up in the feed.
+"""
+import base64
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound
+
+from .pagination import seek
+
+CONTENT_KEY = ('updated_at', 'id')
+TOMBSTONE_KEY = ('deleted_at', 'id')
+EPOCH = (datetime.min.replace(tzinfo=dt_timezone.utc), 0)
+
+
+class CursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = 'The cursor is older than the retained deletions; sync again without `since`.'
+    default_code = 'cursor_expired'
+
+
+def settle_delay():
+    return timedelta(seconds=getattr(settings, 'CONTENT_CHANGES_SETTLE', 2.0))
+
+
+def retention():
+    return timedelta(days=getattr(settings, 'CONTENT_TOMBSTONE_DAYS', 30))
+
+
+def record_deleted(content, author_id=None, reassigned=False):
+    """
+    Leave a tombstone for `content` in the feed of `author_id` (its author
+    by default). A `reassigned` item still exists, so it is only gone for
+    that author: staff feeds skip it.
+    """
+    apps.get_model('content', 'ContentTombstone').objects.create(
+        content_id=content.pk, author_id=content.author_id if author_id is None else author_id,
+        reassigned=reassigned,
+    )
+
+
+def encode_cursor(content_position, tombstone_position):
+    payload = {
+        'c': [content_position[0].isoformat(), content_position[1]],
+        't': [tombstone_position[0].isoformat(), tombstone_position[1]],
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+
+
+def decode_cursor(value):
+    """
+    The (content, tombstone) positions for `?since=`, an opaque cursor or an
+    ISO 8601 datetime; None to start from scratch. Naive times are taken as UTC.
+    """
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is not None:
+            positions = [(moment, 0), (moment, 0)]
+        else:
+            payload = json.loads(base64.urlsafe_b64decode(value.encode()))
+            positions = [(datetime.fromisoformat(payload[key][0]), int(payload[key][1])) for key in ('c', 't')]
+    except (TypeError, ValueError, KeyError, IndexError):
+        raise NotFound('Invalid cursor.')
+    return tuple(
+        (timezone.make_aware(moment, dt_timezone.utc) if timezone.is_naive(moment) else moment, pk)
+        for moment, pk in positions
+    )
+
+
+def get_changes(user, since, columns, limit):
+    """
+    One page of the feed for `user`: `(rows, deleted_ids, cursor, has_more)`.
+    `rows` are values() rows with `columns` (plus the cursor key) of content
+    the user may see.
+    """
+    Content = apps.get_model('content', 'Content')
+    ContentTombstone = apps.get_model('content', 'ContentTombstone')
+    now = timezone.now()
+    upper = now - settle_delay()
+    position = decode_cursor(since)
+    if position is None:
+        # A first sync sends everything there is, so no earlier deletions
+        position = (EPOCH, (upper, 0))
+    elif position[1][0] < now - retention():
+        raise CursorExpired()
+
+    contents = Content.objects.filter(seek(CONTENT_KEY, position[0]), updated_at__lte=upper)
+    tombstones = ContentTombstone.objects.filter(seek(TOMBSTONE_KEY, position[1]), deleted_at__lte=upper)
+    if user.is_staff:
+        # The item is still in the staff feed; its tombstone, written after the
+        # save, would sort after the change and remove it
+        tombstones = tombstones.filter(reassigned=False)
+    else:
+        contents = contents.filter(author_id=user.pk)
+        tombstones = tombstones.filter(author_id=user.pk)
+    columns = list(columns) + [field for field in CONTENT_KEY if field not in columns]
+    contents = contents.order_by(*CONTENT_KEY).values(*columns)[:limit + 1]
+    tombstones = tombstones.order_by(*TOMBSTONE_KEY).values_list(*TOMBSTONE_KEY, 'content_id')[:limit + 1]
+
+    # Tombstones first on a tie: an id can only be reused after its deletion
+    merged = sorted(
+        [(deleted_at, 0, pk, content_id) for deleted_at, pk, content_id in tombstones]
+        + [(row['updated_at'], 1, row['id'], row) for row in contents],
+        key=lambda item: item[:3],
+    )
+    has_more = len(merged) > limit
+    content_position, tombstone_position = position
+    rows, deleted = [], []
+    for moment, kind, pk, item in merged[:limit]:
+        if kind:
+            rows.append(item)
+            content_position = (moment, pk)
+        else:
+            deleted.append(item)
+            tombstone_position = (moment, pk)
+    if not has_more:
+        # Everything up to `upper` has been sent
+        content_position = tombstone_position = (upper, 0)
+    return rows, deleted, encode_cursor(content_position, tombstone_position), has_more
@@ -0,0 +1,30 @@
+"""
+System checks for settings that only work within one process.
+"""
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from . import cache as content_cache
+
+
+@register(Tags.caches)
+def check_content_cache(app_configs, **kwargs):
+    warnings = []
+    if content_cache.is_shared():
+        return warnings
+    if getattr(settings, 'CONTENT_CACHE_TIMEOUT', None):
+        warnings.append(Warning(
+            'The content response cache uses a per-process cache backend.',
+            hint='Writes only invalidate the worker that made them, so other workers serve stale lists, '
+                 'details and ETags for up to CONTENT_CACHE_TIMEOUT seconds. Point CACHES at a shared '
+                 'backend (Redis, Memcached) or set CONTENT_CACHE_TIMEOUT = 0 when running several workers.',
+            id='content.W001',
+        ))
+    if settings.DATABASE_REPLICAS:
+        warnings.append(Warning(
+            'Read-your-writes markers for DATABASE_REPLICAS use a per-process cache backend.',
+            hint='A request served by another worker than the write may read a replica that has not caught '
+                 'up. Point CACHES at a shared backend when running several workers.',
+            id='content.W002',
+        ))
+    return warnings
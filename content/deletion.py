@@ -0,0 +1,186 @@
+"""
+Deferred deletion of document files.
+
+Deleting a content row, or replacing its document, queues a
+`DocumentDeletion` row in the same transaction instead of touching storage,
+so a cascade over thousands of rows costs inserts, not filesystem calls, and
+a rollback leaves nothing to undo. Once the transaction commits, the queue is
+drained in batches of CONTENT_DOCUMENT_GC_BATCH_SIZE: blob references are
+released and files whose last reference went are deleted. Failed entries are
+retried by later drains up to CONTENT_DOCUMENT_GC_MAX_ATTEMPTS times.
+
+CONTENT_DOCUMENT_GC_MODE selects who drains: 'thread' (default, a background
+thread in this process, CONTENT_DOCUMENT_GC_DELAY seconds after the commit),
+'inline' (synchronously on commit, for tests and scripts) or 'off' (only
+`manage.py drain_document_deletions`, e.g. from cron).
+
+`sweep_orphans()` (`manage.py sweep_documents`) reconciles the documents
+directory with the database, for files left behind by crashes.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+TEMP_SUFFIX = '.upload'  # Uploads being hashed by ContentAddressedStorage
+
+_drainer = None
+_drain_scheduled = False
+_drainer_lock = threading.Lock()
+
+
+def get_mode():
+    return getattr(settings, 'CONTENT_DOCUMENT_GC_MODE', 'thread')
+
+
+def get_storage():
+    return apps.get_model('content', 'Content')._meta.get_field('document').storage
+
+
+def queue_release(name):
+    """
+    Queue one reference to document `name` for release after commit.
+    """
+    apps.get_model('content', 'DocumentDeletion').objects.create(name=name)
+    transaction.on_commit(schedule_drain)
+
+
+def schedule_drain():
+    global _drainer, _drain_scheduled
+    mode = get_mode()
+    if mode == 'inline':
+        drain()
+        return
+    if mode == 'off':
+        return
+    with _drainer_lock:
+        # One pending drain covers every commit until it starts
+        if _drain_scheduled:
+            return
+        if _drainer is None:
+            _drainer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='document-gc')
+        _drain_scheduled = True
+    _drainer.submit(_drain_later)
+
+
+def _drain_later():
+    global _drain_scheduled
+    # Give a large cascade the chance to finish committing into the same drain
+    time.sleep(getattr(settings, 'CONTENT_DOCUMENT_GC_DELAY', 1.0))
+    with _drainer_lock:
+        _drain_scheduled = False
+    try:
+        drain()
+    except Exception:
+        logger.exception('Draining queued document deletions failed')
+    finally:
+        close_old_connections()
+
+
+def drain(batch_size=None):
+    """
+    Release every queued reference, a batch per transaction. Returns the
+    number of queue entries released.
+    """
+    DocumentDeletion = apps.get_model('content', 'DocumentDeletion')
+    batch_size = batch_size or getattr(settings, 'CONTENT_DOCUMENT_GC_BATCH_SIZE', 500)
+    max_attempts = getattr(settings, 'CONTENT_DOCUMENT_GC_MAX_ATTEMPTS', 5)
+    storage = get_storage()
+    released = last_id = 0
+    while True:
+        ids = []
+        try:
+            with transaction.atomic():
+                # Locked, so concurrent drainers never release an entry twice
+                batch = list(
+                    DocumentDeletion.objects.select_for_update(skip_locked=True)
+                    .filter(id__gt=last_id, attempts__lt=max_attempts).order_by('id')
+                    .values_list('id', 'name')[:batch_size]
+                )
+                if not batch:
+                    return released
+                ids = [pk for pk, _ in batch]
+                last_id = ids[-1]
+                storage.release_many(Counter(name for _, name in batch))
+                DocumentDeletion.objects.filter(id__in=ids).delete()
+            released += len(ids)
+        except Exception as exc:
+            if not ids:
+                raise
+            logger.warning('Could not release %d queued document(s): %s', len(ids), exc)
+            DocumentDeletion.objects.filter(id__in=ids).update(attempts=F('attempts') + 1, error=str(exc)[:1000])
+
+
+def walk_files(path):
+    """
+    Yield (path, stat) for the files under `path`, one directory at a time.
+    """
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path, entry.stat(follow_symlinks=False)
+
+
+def sweep_orphans(min_age=3600, dry_run=False, batch_size=1000):
+    """
+    Delete document files that neither a blob nor a content row refers to,
+    and upload temp files left by crashed requests. Files younger than
+    `min_age` seconds are skipped, as an upload may not have committed its
+    row yet. Streams the directory in batches of `batch_size` names.
+    Returns counts of what was scanned, deleted and referenced but missing.
+    """
+    Content = apps.get_model('content', 'Content')
+    DocumentBlob = apps.get_model('content', 'DocumentBlob')
+    storage = get_storage()
+    root = storage.path('')
+    cutoff = time.time() - min_age
+    stats = {'scanned': 0, 'orphans': 0, 'temp_files': 0, 'missing': 0}
+
+    def sweep(names):
+        referenced = set(DocumentBlob.objects.filter(name__in=names).values_list('name', flat=True))
+        referenced.update(Content.objects.filter(document__in=names).values_list('document', flat=True))
+        for name in names:
+            if name not in referenced and (dry_run or storage.delete_unreferenced(name)):
+                stats['orphans'] += 1
+
+    batch = []
+    for path, stat in walk_files(storage.path('documents')):
+        stats['scanned'] += 1
+        if stat.st_mtime > cutoff:
+            continue
+        if path.endswith(TEMP_SUFFIX):
+            stats['temp_files'] += 1
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            continue
+        batch.append(os.path.relpath(path, root).replace(os.sep, '/'))
+        if len(batch) >= batch_size:
+            sweep(batch)
+            batch = []
+    if batch:
+        sweep(batch)
+
+    # The other direction: rows pointing at files that are gone
+    for name in Content.objects.exclude(document='').exclude(document__isnull=True) \
+            .values_list('document', flat=True).distinct().iterator(chunk_size=batch_size):
+        if not storage.exists(name):
+            stats['missing'] += 1
+    return stats
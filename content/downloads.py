@@ -0,0 +1,129 @@
+"""
+Serving stored documents: byte ranges, conditional GET and proxy offload.
+"""
+import os
+import re
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.text import slugify
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def document_etag(name, storage):
+    """
+    Content-addressed names already are a hash of the bytes; older uploads
+    fall back to size and modification time.
+    Raises Http404 when the file is missing from storage.
+    """
+    stem = os.path.splitext(os.path.basename(name))[0]
+    if SHA256_RE.match(stem):
+        return f'"{stem}"'
+    try:
+        stat = os.stat(storage.path(name))
+    except OSError:
+        raise Http404('The document file is missing.')
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """
+    Parse a single `bytes=` range into inclusive (start, end).
+    Returns None when the header should be ignored (absent, malformed or
+    multi-range, served as a full response) and False when unsatisfiable.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if last and int(last) < start:
+            return None
+    else:
+        # Suffix range: the last N bytes.
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def _read_range(file, start, length):
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def serve_document(request, content):
+    """
+    Build the response for `content.document`.
+    - `If-None-Match` answers 304 without touching the file.
+    - `Range` answers 206 with the requested bytes (or 416).
+    - With CONTENT_DOCUMENT_SENDFILE set, the front proxy streams the file.
+    - A row whose file is gone from storage answers 404, not 500.
+    """
+    document = content.document
+    storage = document.storage
+    etag = document_etag(document.name, storage)
+    conditional = get_conditional_response(request, etag=etag)
+    if conditional is not None:
+        return conditional
+
+    filename = f"{slugify(content.title) or 'document'}.pdf"
+    headers = {
+        'ETag': etag,
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, max-age=0, must-revalidate',
+        'Content-Disposition': f'inline; filename="{filename}"',
+    }
+
+    mode = getattr(settings, 'CONTENT_DOCUMENT_SENDFILE', None)
+    if mode:
+        # The proxy handles Range itself; Django only authorizes the request.
+        response = HttpResponse(content_type='application/pdf', headers=headers)
+        if mode == 'x-accel-redirect':
+            prefix = getattr(settings, 'CONTENT_DOCUMENT_ACCEL_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + document.name
+        else:
+            response['X-Sendfile'] = storage.path(document.name)
+        return response
+
+    try:
+        file = storage.open(document.name, 'rb')
+    except OSError:
+        raise Http404('The document file is missing.')
+    # Size of the open handle, so a concurrent delete cannot fail between the two.
+    size = file.size
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or if_range == etag:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range is False:
+        headers['Content-Range'] = f'bytes */{size}'
+        file.close()
+        return HttpResponse(status=416, headers=headers)
+
+    start, end = byte_range or (0, size - 1)
+    response = StreamingHttpResponse(
+        _read_range(file, start, end - start + 1),
+        status=206 if byte_range else 200,
+        content_type='application/pdf',
+        headers=headers,
+    )
+    response['Content-Length'] = str(end - start + 1)
+    if byte_range:
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
@@ -0,0 +1,207 @@
+"""
+Live content events, pushed to clients as Server-Sent Events.
+
+Every committed Content create, update and delete (bulk writes included) is
+published as a small event: `{"type": "created"|"updated"|"deleted", "id",
+"author", "updated_at"}`; a reassigned item is `deleted` for its previous
+author and `updated` for the new one. `cms_project.asgi` streams them from
+`GET /api/content/events/` outside Django's request cycle, so an idle client
+holds no thread. Clients authenticate with their access token, as a Bearer
+header or, for `EventSource`, `?token=`, and get staff-wide or their own
+events, like the list. The stream ends with an `expired` event when the
+token expires; the client reconnects with a fresh one. An event says what
+changed, not the new content: clients fetch it from the change feed
+(`content.changes`), which is also how they catch up after reconnecting.
+
+Events go through CONTENT_EVENTS_BROADCASTER, by default `LocalBroadcaster`,
+which only reaches clients connected to the same process. A cross-process
+broadcaster (e.g. over Redis pub/sub) implements the same `publish()` and
+`subscribe()`. A client that falls CONTENT_EVENTS_QUEUE_SIZE events behind
+is disconnected; its `EventSource` reconnects and resyncs.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException, NotAuthenticated
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PATH = '/api/content/events/'
+
+
+class LocalBroadcaster:
+    """
+    Fans events out to the subscribers in this process.
+    """
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        """ Deliver `event` to every subscriber. Called from any thread. """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception('Content event subscriber failed')
+
+    def subscribe(self, callback):
+        """
+        Call `callback(event)`, from any thread, for every published event
+        until the returned function is called.
+        """
+        with self._lock:
+            self._subscribers.add(callback)
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers.discard(callback)
+        return unsubscribe
+
+
+@lru_cache(maxsize=None)
+def get_broadcaster():
+    return import_string(getattr(settings, 'CONTENT_EVENTS_BROADCASTER', 'content.events.LocalBroadcaster'))()
+
+
+def make_event(kind, content, author_id=None):
+    return {
+        'type': kind,
+        'id': content.pk,
+        'author': content.author_id if author_id is None else author_id,
+        'updated_at': content.updated_at.isoformat() if content.updated_at else None,
+    }
+
+
+def publish_on_commit(events):
+    """
+    Publish `events` once the surrounding transaction commits; a rollback drops them.
+    """
+    def publish():
+        broadcaster = get_broadcaster()
+        for event in events:
+            broadcaster.publish(event)
+
+    if events:
+        transaction.on_commit(publish)
+
+
+def can_see(user, event):
+    if user.is_staff:
+        return True
+    # Token users and events relayed by another broadcaster may carry the id as a string
+    to_python = get_user_model()._meta.pk.to_python
+    return to_python(event['author']) == to_python(user.pk)
+
+
+async def authenticate(scope):
+    """
+    The user of the access token in the Authorization header or `?token=`,
+    and the validated token.
+    """
+    from users.authentication import ClaimsJWTAuthentication
+    authentication = ClaimsJWTAuthentication()
+    headers = dict(scope.get('headers') or [])
+    if b'authorization' in headers:
+        raw_token = authentication.get_raw_token(headers[b'authorization'])
+    else:
+        token = parse_qs(scope.get('query_string', b'').decode()).get('token')
+        raw_token = token[0].encode() if token else None
+    if raw_token is None:
+        raise NotAuthenticated()
+    validated_token = authentication.get_validated_token(raw_token)
+    return await authentication.aget_user(validated_token), validated_token
+
+
+async def send_json(send, status_code, data, headers=()):
+    await send({
+        'type': 'http.response.start', 'status': status_code,
+        'headers': [(b'content-type', b'application/json'), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(data).encode()})
+
+
+async def events_app(scope, receive, send):
+    """
+    ASGI app streaming the events the user may see, with a comment every
+    CONTENT_EVENTS_HEARTBEAT seconds so proxies keep the connection open,
+    until the client leaves or its token expires.
+    """
+    if scope['method'] not in ('GET', 'HEAD'):
+        return await send_json(send, 405, {'detail': f'Method "{scope["method"]}" not allowed.'},
+                               [(b'allow', b'GET, HEAD')])
+    try:
+        user, token = await authenticate(scope)
+    except APIException as exc:
+        detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        return await send_json(send, exc.status_code, detail, [(b'www-authenticate', b'Bearer realm="api"')])
+    finally:
+        # No request_finished signal here to release the connection the user lookup may have used
+        await sync_to_async(close_old_connections)()
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    max_queued = getattr(settings, 'CONTENT_EVENTS_QUEUE_SIZE', 1000)
+    heartbeat = getattr(settings, 'CONTENT_EVENTS_HEARTBEAT', 15)
+    expires_at = loop.time() + (token['exp'] - time.time())
+
+    def enqueue(event):
+        # Runs on the loop; None ends the stream
+        if event is not None and queue.qsize() >= max_queued:
+            event = None
+        queue.put_nowait(event)
+
+    def deliver(event):
+        if can_see(user, event):
+            loop.call_soon_threadsafe(enqueue, event)
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        enqueue(None)
+
+    await send({
+        'type': 'http.response.start', 'status': 200,
+        'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no')],
+    })
+    if scope['method'] == 'HEAD':
+        return await send({'type': 'http.response.body', 'body': b''})
+
+    unsubscribe = get_broadcaster().subscribe(deliver)
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+        while True:
+            remaining = expires_at - loop.time()
+            if remaining <= 0:
+                # Events stop with the token's validity; the client reconnects with a fresh one
+                await send({'type': 'http.response.body', 'body': b'event: expired\ndata: {}\n\n', 'more_body': True})
+                break
+            try:
+                event = await asyncio.wait_for(queue.get(), min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                if remaining > heartbeat:
+                    await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+                continue
+            if event is None:
+                break
+            message = f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+            await send({'type': 'http.response.body', 'body': message.encode(), 'more_body': True})
+    finally:
+        unsubscribe()
+        watcher.cancel()
+    await send({'type': 'http.response.body', 'body': b''})
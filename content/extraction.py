@@ -0,0 +1,192 @@
+"""
+Background text extraction for uploaded PDFs.
+
+Saving a content item with a new document marks its `DocumentText` pending
+and, once the transaction commits, submits the file to a process pool so the
+upload request never waits on PDF parsing. Results are written back by a
+single writer thread; failures are retried with exponential backoff up to
+CONTENT_EXTRACTION_MAX_ATTEMPTS. Jobs lost to a restart stay pending and are
+picked up by `manage.py extract_documents`.
+
+CONTENT_EXTRACTION_MODE selects where extraction runs: 'process' (default),
+'inline' (synchronously on commit, for tests and scripts) or 'off'.
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .cache import bump_content_versions
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_writer = None
+_executor_lock = threading.Lock()
+
+
+def extract_pdf_text(path):
+    """
+    Return the text of the PDF at `path`. Runs in a worker process, so it
+    only touches the file, never Django. Uses PyMuPDF when installed (fastest),
+    then pypdf/PyPDF2.
+    """
+    try:
+        import fitz
+    except ImportError:
+        fitz = None
+    if fitz is not None:
+        with fitz.open(path) as pdf:
+            return '\n'.join(page.get_text() for page in pdf).strip()
+    reader = pdf_reader(path)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages).strip()
+
+
+def pdf_reader(path):
+    """
+    A pypdf/PyPDF2 reader for the PDF at `path`, for when PyMuPDF isn't installed.
+    """
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        try:
+            from PyPDF2 import PdfReader
+        except ImportError:
+            raise RuntimeError('No PDF library installed (install PyMuPDF, pypdf or PyPDF2).')
+    return PdfReader(path, strict=False)
+
+
+def extract_or_error(path):
+    """
+    Worker-side wrapper for batch runs: returns (text, None) or (None, error)
+    so one bad file doesn't abort a whole `map()`.
+    """
+    try:
+        return extract_pdf_text(path), None
+    except Exception as exc:
+        return None, f'{type(exc).__name__}: {exc}'
+
+
+def get_mode():
+    return getattr(settings, 'CONTENT_EXTRACTION_MODE', 'process')
+
+
+def max_attempts():
+    return getattr(settings, 'CONTENT_EXTRACTION_MAX_ATTEMPTS', 3)
+
+
+def get_executor(workers=None):
+    global _executor, _writer
+    with _executor_lock:
+        if _executor is None:
+            # 'spawn' keeps workers free of the parent's threads and DB connections
+            _executor = ProcessPoolExecutor(
+                max_workers=workers or getattr(settings, 'CONTENT_EXTRACTION_WORKERS', None),
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='extraction-writer')
+        return _executor
+
+
+def schedule_extraction(content):
+    """
+    Mark `content`'s document text pending and extract it after commit.
+    Called from the Content post_save handler when the document changes.
+    """
+    mode = get_mode()
+    if mode == 'off':
+        return
+    DocumentText = apps.get_model('content', 'DocumentText')
+    name = content.document.name
+    DocumentText.objects.update_or_create(
+        content=content,
+        defaults={'document': name, 'status': DocumentText.PENDING, 'text': '', 'error': '', 'attempts': 0},
+    )
+    transaction.on_commit(lambda: submit(content.pk, name))
+
+
+def submit(content_id, name, delay=0):
+    if get_mode() == 'inline':
+        run_inline(content_id, name)
+        return
+    if delay:
+        timer = threading.Timer(delay, submit, args=(content_id, name))
+        timer.daemon = True
+        timer.start()
+        return
+    try:
+        run_in_pool(extract_pdf_text, document_path(name), _record_future, content_id, name)
+    except Exception:
+        # Runs after commit, so never fail the request; the job stays pending for the backfill
+        logger.exception('Could not queue text extraction for content %s', content_id)
+
+
+def run_in_pool(func, path, record, *args):
+    """
+    Run `func(path)` in the worker pool, then `record(*args, future)` on the
+    single writer thread. Shared with `content.previews`.
+    """
+    future = get_executor().submit(func, path)
+    future.add_done_callback(lambda done: _writer.submit(record, *args, done))
+
+
+def run_inline(content_id, name):
+    try:
+        text = extract_pdf_text(document_path(name))
+    except Exception as exc:
+        record_failure(content_id, name, exc)
+    else:
+        record_success(content_id, name, text)
+
+
+def document_path(name):
+    return apps.get_model('content', 'Content')._meta.get_field('document').storage.path(name)
+
+
+def _record_future(content_id, name, future):
+    close_old_connections()
+    try:
+        text = future.result()
+    except Exception as exc:
+        delay = record_failure(content_id, name, exc)
+        if delay:
+            submit(content_id, name, delay=delay)
+    else:
+        record_success(content_id, name, text)
+
+
+def record_success(content_id, name, text):
+    DocumentText = apps.get_model('content', 'DocumentText')
+    # Matching on `document` drops results for a file that was replaced meanwhile
+    updated = DocumentText.objects.filter(content_id=content_id, document=name).update(
+        status=DocumentText.DONE, text=text, error='', attempts=F('attempts') + 1,
+    )
+    if updated:
+        # The text is searchable now, so cached search results are stale
+        Content = apps.get_model('content', 'Content')
+        author_id = Content.objects.filter(pk=content_id).values_list('author_id', flat=True).first()
+        if author_id is not None:
+            bump_content_versions(author_id)
+
+
+def record_failure(content_id, name, exc, retry=True):
+    """
+    Record a failed attempt. Returns the delay in seconds before retrying,
+    or None once the job has given up (or the document was replaced).
+    """
+    DocumentText = apps.get_model('content', 'DocumentText')
+    logger.warning('Text extraction failed for content %s (%s): %s', content_id, name, exc)
+    rows = DocumentText.objects.filter(content_id=content_id, document=name)
+    rows.update(attempts=F('attempts') + 1, error=str(exc)[:1000])
+    attempts = rows.values_list('attempts', flat=True).first()
+    if attempts is None:
+        return None
+    if retry and attempts < max_attempts() and get_mode() == 'process':
+        return 2 ** attempts
+    rows.update(status=DocumentText.FAILED)
+    return None
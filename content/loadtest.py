@@ -0,0 +1,76 @@
+"""
+HTTP clients and statistics shared by the `bench` and `replay_traffic` commands.
+"""
+import json
+import math
+import re
+import urllib.error
+import urllib.request
+import uuid
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+
+QUERIES_RE = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(sorted_values, q):
+    """ Nearest-rank percentile of an already sorted list. """
+    return sorted_values[max(0, math.ceil(q / 100 * len(sorted_values)) - 1)]
+
+
+class InProcessClient:
+    """ Requests through Django's test client, in this process and database. """
+
+    def __init__(self):
+        self.client = Client(HTTP_HOST='localhost')
+
+    def request(self, method, path, token=None, json_body=None, files=None):
+        extra = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        if json_body is not None:
+            response = self.client.generic(method, path, json.dumps(json_body), 'application/json', **extra)
+        elif files is not None:
+            files = {name: SimpleUploadedFile(*value) if isinstance(value, tuple) else value
+                     for name, value in files.items()}
+            response = self.client.post(path, files, **extra)
+        else:
+            response = self.client.generic(method, path, **extra)
+        return response.status_code, response.headers.get('Server-Timing', ''), response.content
+
+
+class HTTPClient:
+    """ Requests to a running server, e.g. `manage.py runserver` or uvicorn. """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, token=None, json_body=None, files=None):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        data = None
+        if json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers['Content-Type'] = 'application/json'
+        elif files is not None:
+            boundary = uuid.uuid4().hex
+            data = b''
+            for name, value in files.items():
+                if isinstance(value, tuple):
+                    filename, content = value
+                    data += (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                             f'Content-Type: application/pdf\r\n\r\n').encode() + content + b'\r\n'
+                else:
+                    data += f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            data += f'--{boundary}--\r\n'.encode()
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers.get('Server-Timing', ''), response.read()
+        except urllib.error.HTTPError as exc:
+            return exc.code, exc.headers.get('Server-Timing', ''), exc.read()
+
+
+def query_count(server_timing):
+    """ Queries reported in a Server-Timing header (see cms_project.metrics). """
+    match = QUERIES_RE.search(server_timing)
+    return int(match.group(1)) if match else None
@@ -0,0 +1,153 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from content.loadtest import HTTPClient, InProcessClient, percentile, query_count
+from content.models import Content, ContentTombstone
+from content.synthetic import ContentFaker, make_pdf
+
+SCENARIOS = ('login', 'register', 'list', 'search', 'detail', 'upload')
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API endpoints and print throughput, latency percentiles and queries per request as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server (default: in-process test client)')
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS), help=f'Comma-separated subset of: {", ".join(SCENARIOS)}')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=4, help='Concurrent clients')
+        parser.add_argument('--email', default='seed-author-0@example.com', help='Author to log in as (see seed_bulk)')
+        parser.add_argument('--password', default='Password@123')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for request parameters')
+        parser.add_argument('--output', help='Also write the JSON results to this file')
+        parser.add_argument('--keep', action='store_true',
+                            help='In-process: keep the users, content and tokens the run created')
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f'Unknown scenario(s): {", ".join(sorted(unknown))}')
+
+        self.url = options['url']
+        self.local = threading.local()
+        self.faker = ContentFaker(options['seed'])
+        self.credentials = {'email': options['email'], 'password': options['password']}
+        self.pdf = make_pdf('Benchmark upload')
+
+        # In-process runs write to the configured database; undo that afterwards
+        created_after = None if self.url or options['keep'] else self.last_ids()
+        try:
+            self.benchmark(scenarios, options)
+        finally:
+            if created_after is not None:
+                self.delete_created(created_after)
+
+    def benchmark(self, scenarios, options):
+        status, _, body = self.client().request('POST', '/api/users/login/', json_body=self.credentials)
+        if status != 200:
+            raise CommandError(f'Login as {options["email"]} failed ({status}); run seed_bulk or pass --email/--password.')
+        self.token = json.loads(body)['access']
+        self.content_ids = self.collect_content_ids()
+
+        results = {
+            'target': self.url or 'in-process',
+            'concurrency': options['concurrency'],
+            'requests_per_scenario': options['requests'],
+            'scenarios': {name: self.run(name, options['requests'], options['concurrency']) for name in scenarios},
+        }
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
+
+    def last_ids(self):
+        """ The highest id of each table the scenarios insert into. """
+        models = (Content, get_user_model(), OutstandingToken, ContentTombstone)
+        return {model: model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0 for model in models}
+
+    def delete_created(self, last_ids):
+        """
+        Delete the rows inserted since `last_ids`: uploads, registered users
+        and login tokens, then the tombstones those deletions left.
+        """
+        close_old_connections()
+        for model, last_id in last_ids.items():
+            model.objects.filter(pk__gt=last_id).delete()
+
+    def client(self):
+        # One client per thread: the test client is not thread-safe
+        if not hasattr(self.local, 'client'):
+            self.local.client = HTTPClient(self.url) if self.url else InProcessClient()
+        return self.local.client
+
+    def collect_content_ids(self):
+        """
+        Ids for detail requests, from the first list pages. Also sets how many
+        pages list requests may ask for.
+        """
+        ids = []
+        self.pages = 1
+        for page in range(1, 6):
+            status, _, body = self.client().request('GET', f'/api/content/?fields=id&page={page}', token=self.token)
+            if status != 200:
+                break
+            ids += [item['id'] for item in json.loads(body)['results']]
+            self.pages = page
+        return ids
+
+    def make_request(self, name):
+        client = self.client()
+        if name == 'login':
+            return client.request('POST', '/api/users/login/', json_body=self.credentials)
+        if name == 'register':
+            return client.request('POST', '/api/users/register/', json_body={
+                'email': f'bench-{uuid.uuid4().hex}@example.com', 'password': 'Password@123',
+                'full_name': 'Bench User', 'phone': '9876543210', 'pincode': '400001',
+            })
+        if name == 'list':
+            return client.request('GET', f'/api/content/?page={self.faker.random.randint(1, self.pages)}', token=self.token)
+        if name == 'search':
+            return client.request('GET', f'/api/content/?search={self.faker.search_term()}', token=self.token)
+        if name == 'detail':
+            pk = self.faker.random.choice(self.content_ids) if self.content_ids else 0
+            return client.request('GET', f'/api/content/{pk}/', token=self.token)
+        return client.request('POST', '/api/content/', token=self.token, files={
+            'title': self.faker.title(), 'body': self.faker.body(), 'summary': self.faker.summary(),
+            'categories': self.faker.categories(), 'document': ('bench.pdf', self.pdf),
+        })
+
+    def timed_request(self, name):
+        start = time.perf_counter()
+        try:
+            status, server_timing, _ = self.make_request(name)
+        finally:
+            if not self.url:
+                close_old_connections()
+        return time.perf_counter() - start, status, query_count(server_timing)
+
+    def run(self, name, count, concurrency):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(self.timed_request, [name] * count))
+        wall = time.perf_counter() - start
+
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in samples)
+        queries = [queries for _, _, queries in samples if queries is not None]
+        return {
+            'requests': count,
+            'errors': sum(1 for _, status, _ in samples if status >= 400),
+            'throughput_rps': round(count / wall, 1),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'queries_per_request': round(sum(queries) / len(queries), 2) if queries else None,
+        }
@@ -0,0 +1,54 @@
+import timeit
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from content.models import Content
+from content.renderers import UJSONRenderer
+from content.serializers import ContentRowSerializer, ContentSerializer
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark content list serialization and JSON rendering (no database needed)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=100, help='Items per simulated page')
+        parser.add_argument('--repeat', type=int, default=200, help='Pages serialized per measurement')
+
+    def handle(self, *args, **options):
+        page_size, repeat = options['page_size'], options['repeat']
+        now = timezone.now()
+        instances = [
+            Content(
+                id=i, author_id=1 + i % 7, title=f'Title {i}', body='Body text ' * 20, summary='Summary',
+                categories='Art, Science', document=f'documents/ab/{i:064x}.pdf' if i % 2 else '',
+                created_at=now - timedelta(minutes=i), updated_at=now,
+            )
+            for i in range(1, page_size + 1)
+        ]
+        # The same rows `.values(*ContentRowSerializer.columns())` would return
+        columns = ContentRowSerializer.columns()
+        rows = [{column: getattr(item, Content._meta.get_field(column).attname) for column in columns}
+                for item in instances]
+
+        data = ContentSerializer(instances, many=True).data
+        fast_data = ContentRowSerializer(rows).data
+        if JSONRenderer().render(data) != UJSONRenderer().render(fast_data):
+            raise CommandError('Fast path output differs from ContentSerializer.')
+
+        timings = [
+            ('ContentSerializer', lambda: ContentSerializer(instances, many=True).data),
+            ('ContentRowSerializer', lambda: ContentRowSerializer(rows).data),
+            ('JSONRenderer', lambda: JSONRenderer().render(data)),
+            ('UJSONRenderer', lambda: UJSONRenderer().render(data)),
+        ]
+        self.stdout.write(f'{repeat} pages of {page_size} items, best of 3:')
+        results = {}
+        for name, func in timings:
+            results[name] = min(timeit.repeat(func, number=repeat, repeat=3)) / repeat
+            self.stdout.write(f'  {name:<22} {results[name] * 1000:8.3f} ms/page')
+        self.stdout.write(self.style.SUCCESS(
+            f"Serialization {results['ContentSerializer'] / results['ContentRowSerializer']:.1f}x faster, "
+            f"rendering {results['JSONRenderer'] / results['UJSONRenderer']:.1f}x faster."
+        ))
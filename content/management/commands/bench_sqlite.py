@@ -0,0 +1,121 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from django.db import OperationalError, connections, transaction
+from django.core.management.base import BaseCommand
+from content.loadtest import percentile
+
+ENGINES = {
+    'stock': 'django.db.backends.sqlite3',
+    'tuned': 'cms_project.db.sqlite_wal',
+}
+
+
+class Command(BaseCommand):
+    help = ('Compare the stock SQLite backend with cms_project.db.sqlite_wal under concurrent reads and '
+            'read-then-write transactions, on scratch database files. Prints JSON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--engines', default=','.join(ENGINES), help=f'Comma-separated subset of: {", ".join(ENGINES)}')
+        parser.add_argument('--threads', type=int, default=8, help='Concurrent connections')
+        parser.add_argument('--operations', type=int, default=500, help='Operations per thread')
+        parser.add_argument('--write-ratio', type=float, default=0.2, help='Share of operations that write')
+        parser.add_argument('--rows', type=int, default=10000, help='Rows in the table before the run')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--output', help='Also write the JSON results to this file')
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp(prefix='bench-sqlite-')
+        try:
+            results = {
+                'threads': options['threads'],
+                'operations_per_thread': options['operations'],
+                'write_ratio': options['write_ratio'],
+                'engines': {
+                    name.strip(): self.run(name.strip(), os.path.join(directory, f'{name.strip()}.sqlite3'), options)
+                    for name in options['engines'].split(',') if name.strip()
+                },
+            }
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
+
+    def run(self, name, path, options):
+        # A temporary alias, so `transaction.atomic` runs the backend's real transaction code
+        alias = f'bench_sqlite_{name}'
+        connections.settings[alias] = {**connections['default'].settings_dict, 'ENGINE': ENGINES[name], 'NAME': path}
+        try:
+            self.setup_table(alias, options['rows'])
+            samples = {'read': [], 'write': []}
+            errors = []
+            start = time.perf_counter()
+            threads = [
+                threading.Thread(target=self.worker, args=(alias, number, options, samples, errors))
+                for number in range(options['threads'])
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            wall = time.perf_counter() - start
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+
+        result = {'wall_seconds': round(wall, 2), 'errors': len(errors)}
+        completed = 0
+        for kind, latencies in samples.items():
+            latencies.sort()
+            completed += len(latencies)
+            result[f'{kind}_p50_ms'] = round(percentile(latencies, 50), 2)
+            result[f'{kind}_p95_ms'] = round(percentile(latencies, 95), 2)
+            result[f'{kind}_p99_ms'] = round(percentile(latencies, 99), 2)
+        result['throughput_ops'] = round(completed / wall, 1)
+        if errors:
+            result['first_error'] = errors[0]
+        return result
+
+    def setup_table(self, alias, rows):
+        with connections[alias].cursor() as cursor:
+            cursor.execute('CREATE TABLE bench (id INTEGER PRIMARY KEY, bucket INTEGER, payload TEXT)')
+            cursor.execute('CREATE INDEX bench_bucket ON bench (bucket)')
+        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO bench (bucket, payload) VALUES (%s, %s)',
+                [(i % 100, 'x' * 200) for i in range(rows)],
+            )
+
+    def worker(self, alias, number, options, samples, errors):
+        rng = random.Random(None if options['seed'] is None else options['seed'] + number)
+        try:
+            for _ in range(options['operations']):
+                kind = 'write' if rng.random() < options['write_ratio'] else 'read'
+                bucket = rng.randrange(100)
+                start = time.perf_counter()
+                try:
+                    if kind == 'read':
+                        with connections[alias].cursor() as cursor:
+                            cursor.execute('SELECT id, payload FROM bench WHERE bucket = %s LIMIT 20', [bucket])
+                            cursor.fetchall()
+                    else:
+                        # Read, then write: like a login or upload checking a row before saving
+                        with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+                            cursor.execute('SELECT COUNT(*) FROM bench WHERE bucket = %s', [bucket])
+                            cursor.fetchone()
+                            cursor.execute('INSERT INTO bench (bucket, payload) VALUES (%s, %s)', [bucket, 'y' * 200])
+                except OperationalError as exc:
+                    errors.append(f'{kind}: {exc}')
+                    continue
+                samples[kind].append((time.perf_counter() - start) * 1000)
+        finally:
+            connections[alias].close()
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+from content import stats
+
+
+class Command(BaseCommand):
+    help = 'Check the author, category and total statistics against the Content table, and rebuild them if they drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='Only report drift; exit with an error if there is any')
+        parser.add_argument('--rebuild', action='store_true', help='Rebuild from scratch even without drift')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows written per query when rebuilding')
+
+    def handle(self, *args, **options):
+        drift = stats.find_drift()
+        for kind, entries in drift.items():
+            for entry in entries[:20]:
+                self.stdout.write(f"{kind}: {entry}")
+            if len(entries) > 20:
+                self.stdout.write(f"{kind}: ... and {len(entries) - 20} more")
+        drifted = sum(len(entries) for entries in drift.values())
+        if options['check']:
+            if drifted:
+                raise CommandError(f"{drifted} statistics row(s) drifted. Run content_stats without --check to rebuild.")
+            self.stdout.write(self.style.SUCCESS('Statistics are up to date.'))
+            return
+        if not drifted and not options['rebuild']:
+            self.stdout.write(self.style.SUCCESS('Statistics are up to date.'))
+            return
+        authors, categories = stats.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Fixed {drifted} drifted row(s). Rebuilt statistics for {authors} author(s) and {categories} category(ies)."
+        ))
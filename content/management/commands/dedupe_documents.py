@@ -0,0 +1,45 @@
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from content.cache import invalidate_all
+from content.models import Content, DocumentBlob, DocumentPreview, DocumentText
+
+
+class Command(BaseCommand):
+    help = 'Move documents uploaded before content addressing into deduplicated blobs'
+
+    def handle(self, *args, **kwargs):
+        storage = Content._meta.get_field('document').storage
+        blob_names = set(DocumentBlob.objects.values_list('name', flat=True))
+        legacy_names = set()
+        moved = 0
+
+        contents = Content.objects.exclude(document='').exclude(document__isnull=True)
+        for pk, name in contents.values_list('pk', 'document').iterator():
+            if name in blob_names:
+                continue
+            if not storage.exists(name):
+                self.stdout.write(self.style.WARNING(f"Content {pk}: '{name}' is missing, skipped."))
+                continue
+            # update() sends no signals, so the extracted text and preview, which record the
+            # document name they were built from, are renamed with the row
+            with transaction.atomic(), storage.open(name, 'rb') as legacy_file:
+                blob_name = storage.save(name, File(legacy_file))  # Takes one reference on the blob
+                Content.objects.filter(pk=pk).update(document=blob_name)
+                DocumentText.objects.filter(content_id=pk, document=name).update(document=blob_name)
+                DocumentPreview.objects.filter(content_id=pk, document=name).update(document=blob_name)
+            legacy_names.add(name)
+            moved += 1
+
+        removed = 0
+        for name in legacy_names:
+            if not Content.objects.filter(document=name).exists():
+                storage.delete(name)
+                removed += 1
+        if moved:
+            invalidate_all()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {moved} document(s) into {DocumentBlob.objects.count()} blob(s); "
+            f"removed {removed} legacy file(s)."
+        ))
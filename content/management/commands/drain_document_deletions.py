@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+from content.deletion import drain
+
+
+class Command(BaseCommand):
+    help = 'Release queued document references in batches, deleting files that are no longer used'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Entries per transaction (default: CONTENT_DOCUMENT_GC_BATCH_SIZE)')
+        parser.add_argument('--loop', type=float, default=None, metavar='SECONDS',
+                            help='Keep running as a worker, draining every SECONDS')
+
+    def handle(self, *args, **options):
+        while True:
+            released = drain(options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Released {released} queued document reference(s).'))
+            if options['loop'] is None:
+                return
+            time.sleep(options['loop'])
@@ -0,0 +1,45 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from content.extraction import document_path, extract_or_error, record_failure, record_success
+from content.models import Content, DocumentText
+
+
+class Command(BaseCommand):
+    help = 'Extract text from content documents in parallel (backfills pending, failed and missing text)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--all', action='store_true', help='Re-extract documents that already have text')
+
+    def handle(self, *args, **options):
+        contents = Content.objects.exclude(document='').exclude(document__isnull=True)
+        if not options['all']:
+            contents = contents.exclude(document_text__status=DocumentText.DONE)
+        jobs = list(contents.values_list('pk', 'document'))
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS("Nothing to extract."))
+            return
+
+        for pk, name in jobs:
+            DocumentText.objects.update_or_create(
+                content_id=pk,
+                defaults={'document': name, 'status': DocumentText.PENDING, 'text': '', 'error': '', 'attempts': 0},
+            )
+
+        done = failed = 0
+        paths = [document_path(name) for _, name in jobs]
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], mp_context=multiprocessing.get_context('spawn'),
+        ) as pool:
+            for (pk, name), (text, error) in zip(jobs, pool.map(extract_or_error, paths, chunksize=4)):
+                if error is None:
+                    record_success(pk, name, text)
+                    done += 1
+                else:
+                    record_failure(pk, name, error, retry=False)
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f"Content {pk}: {error}"))
+
+        self.stdout.write(self.style.SUCCESS(f"Extracted {done} document(s); {failed} failed."))
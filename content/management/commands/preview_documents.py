@@ -0,0 +1,48 @@
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from content.extraction import document_path
+from content.models import Content, DocumentPreview
+from content.previews import inspect_or_error, preview_width, record_failure, record_success
+
+
+class Command(BaseCommand):
+    help = 'Build document previews and metadata in parallel (backfills pending, failed and missing previews)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--all', action='store_true', help='Rebuild previews that are already done')
+
+    def handle(self, *args, **options):
+        contents = Content.objects.exclude(document='').exclude(document__isnull=True)
+        if not options['all']:
+            contents = contents.exclude(document_preview__status=DocumentPreview.DONE)
+        jobs = list(contents.values_list('pk', 'document'))
+        if not jobs:
+            self.stdout.write(self.style.SUCCESS("Nothing to preview."))
+            return
+
+        for pk, name in jobs:
+            DocumentPreview.objects.update_or_create(
+                content_id=pk,
+                defaults={'document': name, 'status': DocumentPreview.PENDING, 'info': None, 'thumbnail': b'', 'error': ''},
+            )
+
+        done = failed = 0
+        paths = [document_path(name) for _, name in jobs]
+        inspect = functools.partial(inspect_or_error, width=preview_width())
+        with ProcessPoolExecutor(
+            max_workers=options['workers'], mp_context=multiprocessing.get_context('spawn'),
+        ) as pool:
+            for (pk, name), (info, thumbnail, error) in zip(jobs, pool.map(inspect, paths, chunksize=4)):
+                if error is None:
+                    record_success(pk, name, info, thumbnail)
+                    done += 1
+                else:
+                    record_failure(pk, name, error)
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f"Content {pk}: {error}"))
+
+        self.stdout.write(self.style.SUCCESS(f"Previewed {done} document(s); {failed} failed."))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from content.changes import retention
+from content.models import ContentTombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete change-feed tombstones older than CONTENT_TOMBSTONE_DAYS in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Tombstones deleted per transaction')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the expired tombstones')
+
+    def handle(self, *args, **options):
+        expired = ContentTombstone.objects.filter(deleted_at__lt=timezone.now() - retention())
+        if options['dry_run']:
+            self.stdout.write(f'{expired.count()} expired tombstones would be deleted.')
+            return
+
+        deleted = 0
+        while True:
+            # Oldest first, along the (deleted_at, id) index
+            ids = list(expired.order_by('deleted_at', 'id').values_list('id', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                ContentTombstone.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+            self.stdout.write(f'Deleted {deleted} expired tombstones...')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} expired tombstones.'))
@@ -0,0 +1,192 @@
+import json
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from content.loadtest import HTTPClient, InProcessClient, percentile
+from content.models import Content
+from content.synthetic import ContentFaker, make_pdf
+from users.models import User
+
+CONTENT_PATH_RE = re.compile(r'^(/api/content/)(\d+)(/.*)$')
+
+
+class Command(BaseCommand):
+    help = ('Replay a TRAFFIC_CAPTURE_FILE against a local instance, as seeded by seed_bulk, '
+            'and compare per-endpoint latency with the captured timings. Writes are replayed too.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('capture_file', help='JSON lines written by TrafficCaptureMiddleware')
+        parser.add_argument('--url', help='Base URL of a running server (default: in-process test client)')
+        parser.add_argument('--speed', type=float, default=1.0,
+                            help='Time scale: 1 replays at the captured pace, 2 twice as fast, 0 without pauses')
+        parser.add_argument('--concurrency', type=int, default=16, help='Maximum requests in flight')
+        parser.add_argument('--password', default='Password@123', help='Password of the seeded authors')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for synthesized bodies')
+        parser.add_argument('--output', help='Also write the JSON report to this file')
+
+    def handle(self, *args, **options):
+        with open(options['capture_file']) as file:
+            records = sorted((json.loads(line) for line in file if line.strip()), key=lambda record: record['ts'])
+        if not records:
+            raise CommandError('The capture file has no requests.')
+        self.emails = list(
+            User.objects.filter(email__startswith='seed-author-').order_by('id').values_list('email', flat=True)
+        )
+        if not self.emails:
+            raise CommandError('No seeded authors to replay as; run seed_bulk first.')
+
+        self.url = options['url']
+        self.password = options['password']
+        self.faker = ContentFaker(options['seed'])
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.user_emails = {}  # Captured user alias -> seeded author email
+        self.tokens = {}  # Email -> (access token, obtained at)
+        self.content_ids = {}  # Email -> that author's content ids
+        self.token_lifetime = jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds() * 0.8
+
+        results = []
+        speed = options['speed']
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            for record in records:
+                if speed:
+                    delay = (record['ts'] - records[0]['ts']) / speed - (time.perf_counter() - start)
+                    if delay > 0:
+                        time.sleep(delay)
+                results.append((record, pool.submit(self.replay, record)))
+        report = self.report([(record, future.result()) for record, future in results], time.perf_counter() - start)
+
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output + '\n')
+        self.stdout.write(output)
+
+    def client(self):
+        if not hasattr(self.local, 'client'):
+            self.local.client = HTTPClient(self.url) if self.url else InProcessClient()
+        return self.local.client
+
+    def email_for(self, alias):
+        with self.lock:
+            if alias not in self.user_emails:
+                self.user_emails[alias] = self.emails[len(self.user_emails) % len(self.emails)]
+            return self.user_emails[alias]
+
+    def token_for(self, email):
+        with self.lock:
+            token, obtained = self.tokens.get(email, (None, 0))
+        if token and time.monotonic() - obtained < self.token_lifetime:
+            return token
+        status, _, body = self.client().request('POST', '/api/users/login/', json_body={
+            'email': email, 'password': self.password,
+        })
+        if status != 200:
+            raise CommandError(f'Could not log in as {email} ({status}).')
+        token = json.loads(body)['access']
+        with self.lock:
+            self.tokens[email] = (token, time.monotonic())
+        return token
+
+    def map_path(self, path, email):
+        """
+        Point captured content ids at content of the replaying author.
+        """
+        match = CONTENT_PATH_RE.match(path)
+        if not match:
+            return path
+        with self.lock:
+            if email not in self.content_ids:
+                self.content_ids[email] = list(
+                    Content.objects.filter(author__email=email).order_by('id').values_list('id', flat=True)[:1000]
+                )
+            ids = self.content_ids[email]
+        pk = ids[int(match.group(2)) % len(ids)] if ids else match.group(2)
+        return f'{match.group(1)}{pk}{match.group(3)}'
+
+    def fake_value(self, key, email):
+        values = {
+            'title': self.faker.title, 'body': self.faker.body, 'summary': self.faker.summary,
+            'categories': self.faker.categories, 'password': lambda: self.password,
+            'email': lambda: email, 'full_name': lambda: 'Replay User', 'phone': lambda: '9876543210',
+            'pincode': lambda: '400001', 'refresh': lambda: '',
+        }
+        return values.get(key, lambda: 'replay')()
+
+    def build_body(self, record, email):
+        """
+        Synthesize a body with the captured shape: same keys, item count and upload sizes.
+        """
+        body = record.get('body') or {}
+        if body.get('content_type') == 'application/json':
+            if 'items' in body:
+                return {'json_body': [
+                    {key: self.fake_value(key, email) for key in body.get('keys', ())} for _ in range(body['items'])
+                ]}
+            return {'json_body': {key: self.fake_value(key, email) for key in body.get('keys', ())}}
+        if body.get('content_type') == 'multipart/form-data':
+            files = {key: self.fake_value(key, email) for key in body.get('keys', ())}
+            for name, size in body.get('files', {}).items():
+                files[name] = (f'{name}.pdf', make_pdf('Replay', size=size))
+            return {'files': files}
+        return {}
+
+    def replay(self, record):
+        try:
+            route = record.get('route') or ''
+            if route.endswith('/register/'):
+                email = f'replay-{uuid.uuid4().hex}@example.com'
+                token = None
+            else:
+                email = self.email_for(record.get('user') or 'anonymous')
+                token = self.token_for(email) if record.get('user') else None
+            path = self.map_path(record['path'], email)
+            if record.get('query'):
+                path += '?' + record['query']
+            start = time.perf_counter()
+            status, _, _ = self.client().request(record['method'], path, token=token, **self.build_body(record, email))
+            return status, (time.perf_counter() - start) * 1000
+        except Exception as exc:
+            return type(exc).__name__, None
+        finally:
+            if not self.url:
+                close_old_connections()
+
+    def report(self, outcomes, wall):
+        endpoints = {}
+        for record, (status, duration) in outcomes:
+            key = f"{record['method']} {record.get('route') or record['path']}"
+            endpoint = endpoints.setdefault(key, {'captured': [], 'replayed': [], 'errors': 0, 'new_errors': 0})
+            endpoint['captured'].append(record['duration_ms'])
+            if duration is not None:
+                endpoint['replayed'].append(duration)
+            failed = duration is None or status >= 400
+            endpoint['errors'] += failed
+            endpoint['new_errors'] += failed and record['status'] < 400
+
+        summary = {}
+        for key, endpoint in sorted(endpoints.items()):
+            captured, replayed = sorted(endpoint['captured']), sorted(endpoint['replayed'])
+            row = {
+                'requests': len(captured), 'errors': endpoint['errors'], 'new_errors': endpoint['new_errors'],
+                'captured_p50_ms': percentile(captured, 50), 'captured_p95_ms': percentile(captured, 95),
+            }
+            if replayed:
+                row['replayed_p50_ms'] = round(percentile(replayed, 50), 2)
+                row['replayed_p95_ms'] = round(percentile(replayed, 95), 2)
+                if row['captured_p50_ms']:
+                    row['p50_change_pct'] = round((row['replayed_p50_ms'] / row['captured_p50_ms'] - 1) * 100, 1)
+            summary[key] = row
+        return {
+            'target': self.url or 'in-process',
+            'requests': len(outcomes),
+            'wall_seconds': round(wall, 2),
+            'endpoints': summary,
+        }
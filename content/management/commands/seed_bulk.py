@@ -0,0 +1,60 @@
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from content.models import Content
+from content.signals import contents_bulk_saved
+from content.synthetic import ContentFaker, zipf_weights
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Create many synthetic authors and content items for local load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=100, help='Authors to create')
+        parser.add_argument('--contents', type=int, default=10000, help='Content items to create')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+        parser.add_argument('--password', default='Password@123', help='Password shared by all seeded authors')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible data')
+
+    def handle(self, *args, **options):
+        faker = ContentFaker(options['seed'])
+        batch_size = options['batch_size']
+
+        # Hash once: the hasher is deliberately slow and every author shares the password
+        password = make_password(options['password'])
+        start = User.objects.filter(email__startswith='seed-author-').count()
+        users = [
+            User(
+                email=f'seed-author-{start + i}@example.com', password=password,
+                full_name=f'Seed Author {start + i}', phone='9876543210', pincode='400001', is_author=True,
+            )
+            for i in range(options['authors'])
+        ]
+        User.objects.bulk_create(users, batch_size=batch_size)
+        author_ids = list(
+            User.objects.filter(email__startswith='seed-author-', is_author=True).values_list('id', flat=True)
+        )
+        self.stdout.write(f'{len(users)} authors created ({len(author_ids)} seeded in total).')
+        if not author_ids:
+            return
+
+        # A few prolific authors write most of the content
+        author_weights = zipf_weights(len(author_ids), exponent=0.8)
+        created = 0
+        while created < options['contents']:
+            size = min(batch_size, options['contents'] - created)
+            contents = [
+                Content(
+                    author_id=faker.pick(author_ids, author_weights), title=faker.title(),
+                    body=faker.body(), summary=faker.summary(), categories=faker.categories(),
+                )
+                for _ in range(size)
+            ]
+            with transaction.atomic():
+                Content.objects.bulk_create(contents)
+                # Category links and cache versions, as for the bulk API
+                contents_bulk_saved.send(sender=Content, created=contents, updated=[], update_fields=[])
+            created += size
+            self.stdout.write(f'{created}/{options["contents"]} content items created...')
+        self.stdout.write(self.style.SUCCESS(f'Seeded {len(users)} authors and {created} content items.'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from content.deletion import sweep_orphans
+
+
+class Command(BaseCommand):
+    help = 'Delete document files no blob or content row refers to, and report rows whose file is missing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-age', type=int, default=3600, help='Skip files modified in the last N seconds')
+        parser.add_argument('--batch-size', type=int, default=1000, help='File names checked per query')
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be deleted')
+
+    def handle(self, *args, **options):
+        stats = sweep_orphans(options['min_age'], options['dry_run'], options['batch_size'])
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(
+            f"Scanned {stats['scanned']} file(s). {verb} {stats['orphans']} orphaned document(s) "
+            f"and {stats['temp_files']} stale upload temp file(s)."
+        )
+        if stats['missing']:
+            self.stdout.write(self.style.WARNING(f"{stats['missing']} document(s) referenced by content are missing."))
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+from content import search
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            search.install_sqlite_index(cursor, rebuild=True)
+    elif vendor == 'postgresql':
+        Content = apps.get_model('content', 'Content')
+        schema_editor.add_index(Content, search.postgres_index())
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        for statement in search.SQLITE_TEARDOWN:
+            schema_editor.execute(statement)
+    elif vendor == 'postgresql':
+        Content = apps.get_model('content', 'Content')
+        schema_editor.remove_index(Content, search.postgres_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.18 on 2026-10-18 20:17
+
+import content.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0003_content_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentSearchIndex',
+            fields=[
+                ('content', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='content.content')),
+                ('document', content.models.FullTextField(db_column='content_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'content_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'verbose_name_plural': 'categories',
+            },
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='category_set',
+            field=models.ManyToManyField(blank=True, related_name='contents', to='content.category'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+def split_categories(apps, schema_editor):
+    """
+    Populate Category and the content/category links from the existing
+    comma-separated `categories` strings.
+    """
+    Content = apps.get_model('content', 'Content')
+    Category = apps.get_model('content', 'Category')
+    Link = Content.category_set.through
+
+    names = {}
+    rows = []
+    for content_id, value in Content.objects.values_list('id', 'categories').iterator():
+        keys = []
+        for name in (value or '').split(','):
+            name = name.strip()
+            if name and name.casefold() not in keys:
+                keys.append(name.casefold())
+                names.setdefault(name.casefold(), name)
+        rows.append((content_id, keys))
+
+    Category.objects.bulk_create(
+        [Category(key=key, name=name) for key, name in names.items()],
+        ignore_conflicts=True,
+    )
+    ids = dict(Category.objects.values_list('key', 'id'))
+    Link.objects.bulk_create(
+        [Link(content_id=content_id, category_id=ids[key]) for content_id, keys in rows for key in keys],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0004_category'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_categories, migrations.RunPython.noop),
+    ]
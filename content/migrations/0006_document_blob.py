@@ -0,0 +1,31 @@
+# Generated by Django 4.2.18 on 2026-10-18 20:19
+
+import content.storage
+import content.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0005_split_categories'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('sha256', models.CharField(max_length=64)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='content',
+            name='document',
+            field=models.FileField(blank=True, null=True, storage=content.storage.document_storage, upload_to='documents/', validators=[content.validators.validate_pdf]),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.18 on 2026-10-18 20:22
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from content import search
+
+
+def rebuild_search_index(apps, schema_editor):
+    """
+    Recreate the FTS5 table with a column for extracted PDF text.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in search.SQLITE_TEARDOWN:
+        schema_editor.execute(statement)
+    with schema_editor.connection.cursor() as cursor:
+        search.install_sqlite_index(cursor, rebuild=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0006_document_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentText',
+            fields=[
+                ('content', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document_text', serialize=False, to='content.content')),
+                ('document', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10)),
+                ('text', models.TextField(blank=True)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
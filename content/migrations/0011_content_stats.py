@@ -0,0 +1,64 @@
+# Generated by Django 4.2.18 on 2026-10-18 21:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Max, Q
+
+
+def count_contents(apps, schema_editor):
+    """
+    Populate the statistics from the existing content.
+    """
+    Content = apps.get_model('content', 'Content')
+    AuthorStats = apps.get_model('content', 'AuthorStats')
+    CategoryStats = apps.get_model('content', 'CategoryStats')
+    has_document = Q(document__isnull=False) & ~Q(document='')
+    AuthorStats.objects.bulk_create([
+        AuthorStats(**row)
+        for row in Content.objects.order_by().values('author_id').annotate(
+            content_count=Count('id'), document_count=Count('id', filter=has_document),
+            last_created_at=Max('created_at'), last_updated_at=Max('updated_at'),
+        )
+    ], batch_size=500)
+    CategoryStats.objects.bulk_create([
+        CategoryStats(**row)
+        for row in Content.category_set.through.objects.order_by().values('category_id').annotate(
+            content_count=Count('id'),
+        )
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_claimsuser'),
+        ('content', '0010_document_preview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='content_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('content_count', models.PositiveIntegerField(default=0)),
+                ('document_count', models.PositiveIntegerField(default=0)),
+                ('last_created_at', models.DateTimeField(blank=True, null=True)),
+                ('last_updated_at', models.DateTimeField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'author stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='content.category')),
+                ('content_count', models.PositiveIntegerField(db_index=True, default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'category stats',
+            },
+        ),
+        migrations.RunPython(count_contents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.18 on 2026-10-18 21:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_content_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_id', models.BigIntegerField()),
+                ('author_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['author_id', 'deleted_at', 'id'], name='tombstone_author_deleted_idx'), models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx')],
+            },
+        ),
+    ]
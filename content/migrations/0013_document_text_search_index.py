@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from content import search
+
+
+def create_text_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        DocumentText = apps.get_model('content', 'DocumentText')
+        schema_editor.add_index(DocumentText, search.postgres_text_index())
+
+
+def drop_text_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        DocumentText = apps.get_model('content', 'DocumentText')
+        schema_editor.remove_index(DocumentText, search.postgres_text_index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0012_content_tombstone'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_text_index, drop_text_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.18 on 2026-10-18 22:01
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def sum_author_stats(apps, schema_editor):
+    """
+    Populate the totals row from the per-author statistics.
+    """
+    AuthorStats = apps.get_model('content', 'AuthorStats')
+    ContentTotals = apps.get_model('content', 'ContentTotals')
+    totals = AuthorStats.objects.filter(content_count__gt=0).aggregate(
+        author_count=Count('author_id'), content_count=Sum('content_count'), document_count=Sum('document_count'),
+    )
+    ContentTotals.objects.create(pk=1, **{field: value or 0 for field, value in totals.items()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_document_text_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author_count', models.PositiveIntegerField(default=0)),
+                ('content_count', models.PositiveIntegerField(default=0)),
+                ('document_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'content totals',
+            },
+        ),
+        migrations.RunPython(sum_author_stats, migrations.RunPython.noop),
+    ]
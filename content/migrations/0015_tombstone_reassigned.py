@@ -0,0 +1,18 @@
+# Generated by Django 4.2.18 on 2026-10-18 22:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_content_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contenttombstone',
+            name='reassigned',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.18 on 2026-10-18 23:20
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+TOTALS_SLOTS = 16  # content.stats.TOTALS_SLOTS when this migration was written
+
+
+def split_totals(apps, schema_editor):
+    """
+    Replace the single totals row with one row per slot, from the per-author statistics.
+    """
+    AuthorStats = apps.get_model('content', 'AuthorStats')
+    ContentTotals = apps.get_model('content', 'ContentTotals')
+    slots = {}
+    for row in AuthorStats.objects.filter(content_count__gt=0).values('author_id', 'content_count', 'document_count'):
+        number = row['author_id'] % TOTALS_SLOTS
+        slot = slots.setdefault(number, ContentTotals(slot=number))
+        slot.author_count += 1
+        slot.content_count += row['content_count']
+        slot.document_count += row['document_count']
+    ContentTotals.objects.all().delete()
+    ContentTotals.objects.bulk_create(slots.values())
+
+
+def merge_totals(apps, schema_editor):
+    """
+    Sum the slot rows back into the single row read before this migration.
+    """
+    ContentTotals = apps.get_model('content', 'ContentTotals')
+    fields = ('author_count', 'content_count', 'document_count')
+    totals = ContentTotals.objects.aggregate(**{field: Sum(field) for field in fields})
+    ContentTotals.objects.all().delete()
+    ContentTotals.objects.create(pk=1, slot=0, **{field: value or 0 for field, value in totals.items()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0015_tombstone_reassigned'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contenttotals',
+            name='slot',
+            field=models.PositiveSmallIntegerField(default=0),
+            preserve_default=False,
+        ),
+        migrations.RunPython(split_totals, merge_totals),
+        migrations.AlterField(
+            model_name='contenttotals',
+            name='slot',
+            field=models.PositiveSmallIntegerField(unique=True),
+        ),
+    ]
@@ -1,25 +1,387 @@
-from django.db import models
+from collections import Counter
+
+from django.db import models, router, transaction
+from django.db.models import Lookup
 from django.contrib.auth import get_user_model
 from .validators import validate_pdf
-from django.db.models.signals import post_delete
+from .storage import document_storage
+from .extraction import schedule_extraction
+from .previews import schedule_preview
+from .deletion import queue_release
+from .signals import contents_bulk_saved
+from .cache import bump_content_versions
+from . import changes, events, stats
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
 User = get_user_model()
 
+def parse_categories(value):
+    """
+    Split a comma-separated categories string into unique (key, name) pairs.
+    The key is the case-folded name, used for exact, case-insensitive lookups.
+    """
+    pairs = {}
+    for name in (value or '').split(','):
+        name = name.strip()
+        if name:
+            pairs.setdefault(name.casefold(), name)
+    return list(pairs.items())
+
+
+class Category(models.Model):
+    key = models.CharField(max_length=100, unique=True)  # Case-folded name, indexed for exact filters
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        verbose_name_plural = "categories"
+
+    def __str__(self):
+        return self.name
+
+
 class Content(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name="contents")
     title = models.CharField(max_length=30)
     body = models.TextField(max_length=300)
     summary = models.CharField(max_length=60)
     categories = models.CharField(max_length=100)  # Comma-separated categories
-    document = models.FileField(upload_to='documents/', blank=True, null=True, validators=[validate_pdf])  # Add the validator
+    category_set = models.ManyToManyField(Category, related_name="contents", blank=True)  # Normalized from `categories`
+    document = models.FileField(
+        upload_to='documents/', storage=document_storage,  # Deduplicated by content hash
+        blank=True, null=True, validators=[validate_pdf],  # Add the validator
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # One index per list access pattern, each ending in `id` so the keyset
+        # orderings (see content.pagination.ORDERINGS) are read in index order
+        # without a sort: authors filter on `author`, staff list everything.
+        indexes = [
+            models.Index(fields=['author', 'id'], name='content_author_id_idx'),
+            models.Index(fields=['author', 'created_at', 'id'], name='content_author_created_idx'),
+            models.Index(fields=['author', 'updated_at', 'id'], name='content_author_updated_idx'),
+            models.Index(fields=['created_at', 'id'], name='content_created_idx'),
+            models.Index(fields=['updated_at', 'id'], name='content_updated_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored document so a replaced one can be released on save
+        instance._stored_document = instance.__dict__.get('document')
+        # And what the statistics counted it as (document unknown if deferred)
+        has_document = bool(instance._stored_document) if 'document' in instance.__dict__ else None
+        instance._counted_as = (instance.__dict__.get('author_id'), has_document)
+        instance._stored_author_id = instance.__dict__.get('author_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Storing a new upload takes a blob reference (FileField.pre_save), so
+        # the row is written in the same transaction: a failed write can't
+        # leave the reference behind.
+        uploading = bool(self.document) and not self.document._committed
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        outermost = not transaction.get_connection(using).in_atomic_block
+        try:
+            with transaction.atomic(using=using):
+                super().save(*args, **kwargs)
+        except Exception:
+            if uploading and outermost and self.document._committed:
+                # The reference rolled back; drop the file unless another item has it
+                self.document.storage.delete_unreferenced(self.document.name)
+            raise
+
+    def sync_categories(self):
+        """
+        Point `category_set` at the categories named in the `categories` string,
+        creating any that don't exist yet.
+        """
+        bulk_sync_categories([self])
+
+
+def bulk_sync_categories(contents):
+    """
+    Rebuild the category links of many content items in a fixed number of queries.
+    """
+    pairs = {content.pk: parse_categories(content.categories) for content in contents}
+    names = {}
+    for items in pairs.values():
+        for key, name in items:
+            names.setdefault(key, name)
+    existing = set(Category.objects.filter(key__in=names).values_list('key', flat=True))
+    Category.objects.bulk_create(
+        [Category(key=key, name=name) for key, name in names.items() if key not in existing],
+        ignore_conflicts=True,
+    )
+    ids = dict(Category.objects.filter(key__in=names).values_list('key', 'id'))
+    Link = Content.category_set.through
+    links = Link.objects.filter(content_id__in=pairs)
+    deltas = Counter()
+    deltas.subtract(links.values_list('category_id', flat=True))  # Kept in the per-category statistics
+    links.delete()
+    new_links = [Link(content_id=pk, category_id=ids[key]) for pk, items in pairs.items() for key, _ in items]
+    Link.objects.bulk_create(new_links)
+    for link in new_links:
+        deltas[link.category_id] += 1
+    stats.add_category_counts(deltas)
+
+
+class DocumentBlob(models.Model):
+    """
+    One stored document file, shared by every Content row with identical bytes.
+    """
+    name = models.CharField(max_length=255, unique=True)  # Storage path: documents/<aa>/<sha256>.pdf
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)  # Content rows pointing at this file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class DocumentDeletion(models.Model):
+    """
+    A document reference to release, queued when a content row is deleted or
+    its document replaced, and released in batches by `content.deletion`.
+    """
+    name = models.CharField(max_length=255)  # Storage path of the document
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class DocumentText(models.Model):
+    """
+    Text extracted from a content item's PDF in the background (see `content.extraction`).
+    """
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, primary_key=True, related_name="document_text")
+    document = models.CharField(max_length=100)  # Document name the text belongs to
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    text = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.content_id}: {self.status}"
+
+
+class DocumentPreview(models.Model):
+    """
+    Page count, size, title and a first-page thumbnail of a content item's PDF,
+    built in the background (see `content.previews`).
+    """
+    PENDING = 'pending'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    content = models.OneToOneField(Content, on_delete=models.CASCADE, primary_key=True, related_name="document_preview")
+    document = models.CharField(max_length=100)  # Document name the preview belongs to
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    info = models.JSONField(null=True, blank=True)  # Returned as-is in content responses; None until done
+    thumbnail = models.BinaryField(blank=True)  # JPEG; empty when it couldn't be rendered
+    error = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.content_id}: {self.status}"
+
+
+class AuthorStats(models.Model):
+    """
+    An author's content statistics, kept up to date by `content.stats`.
+    """
+    author = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="content_stats")
+    content_count = models.PositiveIntegerField(default=0)
+    document_count = models.PositiveIntegerField(default=0)  # Content with a document
+    last_created_at = models.DateTimeField(null=True, blank=True)  # Newest content
+    last_updated_at = models.DateTimeField(null=True, blank=True, db_index=True)  # Latest content save
+
+    class Meta:
+        verbose_name_plural = "author stats"
+
+    def __str__(self):
+        return f"{self.author_id}: {self.content_count}"
+
+
+class CategoryStats(models.Model):
+    """
+    A category's content count, kept up to date by `content.stats`.
+    """
+    category = models.OneToOneField(Category, on_delete=models.CASCADE, primary_key=True, related_name="stats")
+    content_count = models.PositiveIntegerField(default=0, db_index=True)
+
+    class Meta:
+        verbose_name_plural = "category stats"
+
+    def __str__(self):
+        return f"{self.category_id}: {self.content_count}"
+
+
+class ContentTotals(models.Model):
+    """
+    The statistics summed over the authors of one slot, kept up to date by
+    `content.stats`. The dashboard totals sum the (at most TOTALS_SLOTS) rows.
+    """
+    slot = models.PositiveSmallIntegerField(unique=True)
+    author_count = models.PositiveIntegerField(default=0)  # Authors with content
+    content_count = models.PositiveIntegerField(default=0)
+    document_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "content totals"
+
+    def __str__(self):
+        return f"Slot {self.slot}: {self.author_count} authors, {self.content_count} contents"
+
+
+class ContentTombstone(models.Model):
+    """
+    A content item that left an author's change feed, deleted or reassigned
+    (see `content.changes`).
+    """
+    content_id = models.BigIntegerField()
+    author_id = models.BigIntegerField()  # Not a foreign key: outlives a deleted author
+    deleted_at = models.DateTimeField(auto_now_add=True)
+    # Moved to another author rather than deleted: staff, who see every author, skip these
+    reassigned = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['author_id', 'deleted_at', 'id'], name='tombstone_author_deleted_idx'),
+            models.Index(fields=['deleted_at', 'id'], name='tombstone_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.content_id} ({self.deleted_at})"
+
+
+class FullTextField(models.TextField):
+    """
+    The FTS5 hidden column named after its table; only supports `__match`.
+    """
+
+
+@FullTextField.register_lookup
+class FullTextMatch(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class ContentSearchIndex(models.Model):
+    """
+    Read-only view of the SQLite FTS5 table maintained by triggers (see `content.search`).
+    """
+    content = models.OneToOneField(
+        Content, primary_key=True, db_column='rowid', db_constraint=False,
+        on_delete=models.DO_NOTHING, related_name='search_index',
+    )
+    document = FullTextField(db_column='content_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'content_fts'
+
+
+@receiver(post_save, sender=Content)
+def sync_content_categories(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields is not None and 'categories' not in update_fields):
+        return
+    instance.sync_categories()
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def invalidate_content_cache(sender, instance, **kwargs):
+    bump_content_versions(instance.author_id)
+
+@receiver(contents_bulk_saved, sender=Content)
+def bulk_saved(sender, created, updated, update_fields, **kwargs):
+    bulk_sync_categories(created + (updated if 'categories' in update_fields else []))
+    stats.contents_bulk_saved(created, updated)
+    events.publish_on_commit(
+        [events.make_event('created', content) for content in created]
+        + [events.make_event('updated', content) for content in updated]
+    )
+    for author_id in {content.author_id for content in created + updated}:
+        bump_content_versions(author_id)
+
+@receiver(post_save, sender=Content)
+def count_saved_content(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    stats.content_saved(instance, created, getattr(instance, '_counted_as', None))
+    has_document = bool(instance.document) if 'document' in instance.__dict__ else None
+    instance._counted_as = (instance.author_id, has_document)
+
+@receiver(pre_delete, sender=Content)
+def uncount_content_categories(sender, instance, **kwargs):
+    stats.content_deleting(instance)
+
+@receiver(post_delete, sender=Content)
+def uncount_deleted_content(sender, instance, **kwargs):
+    stats.content_deleted(instance)
+
+@receiver(pre_delete, sender=User)
+def uncount_deleted_author(sender, instance, **kwargs):
+    stats.author_deleting(instance.pk)
+
+@receiver(post_save, sender=Content)
+def record_content_change(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_stored_author_id', None)
+    instance._stored_author_id = instance.author_id
+    if raw:
+        return
+    published = [events.make_event('created' if created else 'updated', instance)]
+    if previous is not None and previous != instance.author_id:
+        # Gone from the previous author's change feed and event stream
+        changes.record_deleted(instance, author_id=previous, reassigned=True)
+        published.insert(0, events.make_event('deleted', instance, author_id=previous))
+    events.publish_on_commit(published)
+
+@receiver(post_save, sender=Content)
+def document_changed(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_stored_document', None)
+    current = instance.document.name or None
+    instance._stored_document = current
+    if raw or previous == current:
+        return
+    if previous:
+        # Release the replaced file once the new reference is committed
+        queue_release(previous)
+    if current:
+        schedule_extraction(instance)
+        schedule_preview(instance)
+    else:
+        DocumentText.objects.filter(content=instance).delete()
+        DocumentPreview.objects.filter(content=instance).delete()
+
+@receiver(post_delete, sender=Content)
+def record_deleted_content(sender, instance, **kwargs):
+    changes.record_deleted(instance)
+    events.publish_on_commit([events.make_event('deleted', instance)])
+
 @receiver(post_delete, sender=Content)
 def delete_document(sender, instance, **kwargs):
     if instance.document:
-        instance.document.delete(False)  # Delete the file
+        # Drop this row's reference later; the file goes with the last one
+        queue_release(instance.document.name)
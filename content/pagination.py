@@ -0,0 +1,177 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.paginator import InvalidPage, Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# Public ordering names mapped to the keys they seek on. Every key ends with
+# `id`, so positions are unique and no row is skipped or repeated.
+ORDERINGS = {
+    'id': ('id',),
+    'created_at': ('created_at', 'id'),
+    'updated_at': ('updated_at', 'id'),
+}
+DEFAULT_ORDERING = 'id'
+
+
+def get_ordering(request):
+    """
+    Read `?ordering=` (e.g. `created_at` or `-created_at`).
+    Returns the ordering name and whether it is descending.
+    """
+    value = request.query_params.get('ordering', DEFAULT_ORDERING) or DEFAULT_ORDERING
+    descending = value.startswith('-')
+    name = value.lstrip('-')
+    if name not in ORDERINGS:
+        raise ValidationError({'ordering': [f"Must be one of: {', '.join(sorted(ORDERINGS))} (prefix '-' for descending)."]})
+    return name, descending
+
+
+def seek(fields, position, descending=False):
+    """
+    Rows strictly after `position` in `fields` order, e.g. for (created_at, id):
+    created_at >= c AND (created_at > c OR (created_at = c AND id > i)).
+    The redundant leading bound lets the database range-scan the index.
+    """
+    lookup = 'lt' if descending else 'gt'
+    condition = Q()
+    for index, field in enumerate(fields):
+        equal = dict(zip(fields[:index], position[:index]))
+        condition |= Q(**equal, **{f'{field}__{lookup}': position[index]})
+    if len(fields) > 1:
+        condition &= Q(**{f'{fields[0]}__{lookup}e': position[0]})
+    return condition
+
+
+def order_by_fields(name, descending):
+    prefix = '-' if descending else ''
+    return [prefix + field for field in ORDERINGS[name]]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the ordering key instead of using
+    COUNT(*) and OFFSET, so every page costs the same as the first one.
+    - Opt in with `?cursor=` (empty for the first page).
+    - `next`/`previous` are opaque links carrying the cursor to follow.
+    """
+    page_size = 10
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        return self.set_page([item async for item in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """
+        The query for this page, with one extra row to tell whether more follow.
+        """
+        self.request = request
+        self.ordering, self.descending = get_ordering(request)
+        self.fields = ORDERINGS[self.ordering]
+
+        self.position, self.reverse = self.decode_cursor(request)
+        # Walking backwards means seeking the opposite way and flipping the page.
+        descending = self.descending != self.reverse
+        queryset = queryset.order_by(*order_by_fields(self.ordering, descending))
+        if self.position is not None:
+            queryset = queryset.filter(self.seek(self.position, descending))
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(self.position_of(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Ran past the end: step back to the start of the listing.
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.position_of(self.page[0]), reverse=True)
+
+    def seek(self, position, descending):
+        return seek(self.fields, position, descending)
+
+    def position_of(self, item):
+        if isinstance(item, dict):
+            return [item[field] for field in self.fields]
+        return [getattr(item, field) for field in self.fields]
+
+    def encode_cursor(self, position, reverse):
+        payload = {
+            'o': self.ordering,
+            'p': [value.isoformat() if isinstance(value, datetime) else value for value in position],
+        }
+        if reverse:
+            payload['r'] = 1
+        token = base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param, '')
+        if not token:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            if payload['o'] != self.ordering or len(payload['p']) != len(self.fields):
+                raise ValueError
+            position = [
+                datetime.fromisoformat(value) if field.endswith('_at') else int(value)
+                for field, value in zip(self.fields, payload['p'])
+            ]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination for async views: counts and fetches the page with
+    the async ORM, then builds the same links and response.
+    """
+    page_size = 10
+
+    async def apaginate_queryset(self, queryset, request):
+        page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()  # Replaces the sync cached_property
+        page_number = self.get_page_number(request, paginator)
+        try:
+            number = paginator.validate_number(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+
+        bottom = (number - 1) * page_size
+        results = [item async for item in queryset[bottom:bottom + page_size]]
+        self.page = Page(results, number, paginator)
+        self.request = request
+        return results
@@ -0,0 +1,180 @@
+"""
+Background previews for uploaded PDFs.
+
+Alongside text extraction, saving a content item with a new document
+queues a job in the same process pool (and the same CONTENT_EXTRACTION_MODE)
+that reads the page count, first-page size and title, and renders a small
+JPEG of the first page (CONTENT_PREVIEW_WIDTH pixels wide). The results are
+stored in `DocumentPreview`: the metadata as a compact `info` dict that list
+and detail responses return as `document_info`, the image as bytes served by
+`GET /api/content/<id>/preview/`. Rendering needs PyMuPDF; without it, the
+metadata is still read with pypdf/PyPDF2 and there is no image. Jobs lost to
+a restart stay pending and are picked up by `manage.py preview_documents`.
+Recording a result moves the item's `updated_at` forward, so its ETag and
+the change feed follow `document_info`.
+"""
+import functools
+import hashlib
+import logging
+import os
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from . import events, stats
+from .cache import bump_content_versions
+from .extraction import document_path, get_mode, pdf_reader, run_in_pool
+
+logger = logging.getLogger(__name__)
+
+TITLE_LENGTH = 200
+
+
+def preview_width():
+    return getattr(settings, 'CONTENT_PREVIEW_WIDTH', 200)
+
+
+def thumbnail_version(thumbnail):
+    return hashlib.md5(thumbnail, usedforsecurity=False).hexdigest()
+
+
+def inspect_pdf(path, width):
+    """
+    Return `(info, thumbnail)` for the PDF at `path`. `info` holds the file
+    `size` in bytes, `pages`, the first page's `width`/`height` in points and
+    the `title`; `thumbnail` is a JPEG of the first page `width` pixels wide,
+    or b'' when it can't be rendered. Runs in a worker process, so it only
+    touches the file, never Django.
+    """
+    info = {'size': os.path.getsize(path)}
+    try:
+        import fitz
+    except ImportError:
+        fitz = None
+    if fitz is not None:
+        with fitz.open(path) as pdf:
+            info['pages'] = pdf.page_count
+            info['title'] = ((pdf.metadata or {}).get('title') or '')[:TITLE_LENGTH]
+            if not pdf.page_count:
+                return info, b''
+            page = pdf[0]
+            info['width'], info['height'] = round(page.rect.width), round(page.rect.height)
+            zoom = width / page.rect.width
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return info, pixmap.tobytes('jpeg', jpg_quality=75)
+
+    reader = pdf_reader(path)
+    metadata = reader.metadata
+    info['pages'] = len(reader.pages)
+    info['title'] = str(metadata.title or '')[:TITLE_LENGTH] if metadata else ''
+    if info['pages']:
+        box = reader.pages[0].mediabox
+        info['width'], info['height'] = round(float(box.width)), round(float(box.height))
+    return info, b''
+
+
+def inspect_or_error(path, width):
+    """
+    Worker-side wrapper for batch runs: returns `(info, thumbnail, None)` or
+    `(None, None, error)` so one bad file doesn't abort a whole `map()`.
+    """
+    try:
+        return (*inspect_pdf(path, width), None)
+    except Exception as exc:
+        return None, None, f'{type(exc).__name__}: {exc}'
+
+
+def schedule_preview(content):
+    """
+    Mark `content`'s document preview pending and build it after commit.
+    Called from the Content post_save handler when the document changes.
+    """
+    mode = get_mode()
+    if mode == 'off':
+        return
+    DocumentPreview = apps.get_model('content', 'DocumentPreview')
+    name = content.document.name
+    DocumentPreview.objects.update_or_create(
+        content=content,
+        defaults={'document': name, 'status': DocumentPreview.PENDING, 'info': None, 'thumbnail': b'', 'error': ''},
+    )
+    transaction.on_commit(lambda: submit(content.pk, name))
+
+
+def submit(content_id, name):
+    if get_mode() == 'inline':
+        try:
+            info, thumbnail = inspect_pdf(document_path(name), preview_width())
+        except Exception as exc:
+            record_failure(content_id, name, exc)
+        else:
+            record_success(content_id, name, info, thumbnail)
+        return
+    try:
+        inspect = functools.partial(inspect_pdf, width=preview_width())
+        run_in_pool(inspect, document_path(name), _record_future, content_id, name)
+    except Exception:
+        # Runs after commit, so never fail the request; the job stays pending for the backfill
+        logger.exception('Could not queue a document preview for content %s', content_id)
+
+
+def _record_future(content_id, name, future):
+    close_old_connections()
+    try:
+        info, thumbnail = future.result()
+    except Exception as exc:
+        record_failure(content_id, name, exc)
+    else:
+        record_success(content_id, name, info, thumbnail)
+
+
+def record_success(content_id, name, info, thumbnail):
+    DocumentPreview = apps.get_model('content', 'DocumentPreview')
+    if thumbnail:
+        # Versioned by the image, so clients can cache it
+        version = thumbnail_version(thumbnail)[:16]
+        info = {**info, 'preview': f"{reverse('content-preview', args=[content_id])}?v={version}"}
+    with transaction.atomic():
+        # Matching on `document` drops results for a file that was replaced meanwhile
+        updated = DocumentPreview.objects.filter(content_id=content_id, document=name).update(
+            status=DocumentPreview.DONE, info=info, thumbnail=thumbnail, error='',
+        )
+        if updated:
+            touch_content(content_id)
+
+
+def record_failure(content_id, name, exc):
+    """
+    Record a failed preview. Unlike text extraction there is no retry: the
+    same file fails the same way, and the document itself is still served.
+    """
+    DocumentPreview = apps.get_model('content', 'DocumentPreview')
+    logger.warning('Document preview failed for content %s (%s): %s', content_id, name, exc)
+    with transaction.atomic():
+        updated = DocumentPreview.objects.filter(content_id=content_id, document=name).update(
+            status=DocumentPreview.FAILED, error=str(exc)[:1000],
+        )
+        if updated:
+            touch_content(content_id)
+
+
+def touch_content(content_id):
+    """
+    Move the item's `updated_at` forward, as a save would, now that its
+    `document_info` is no longer pending: its ETag and Last-Modified change,
+    the change feed and event stream carry it, and cached responses are
+    dropped. Goes through `QuerySet.update()` so the document isn't
+    re-extracted.
+    """
+    Content = apps.get_model('content', 'Content')
+    now = timezone.now()
+    contents = Content.objects.filter(pk=content_id)
+    author_id = contents.values_list('author_id', flat=True).first()
+    if author_id is None or not contents.update(updated_at=now):
+        return
+    stats.add_author_stats(author_id, updated_at=now)
+    bump_content_versions(author_id)
+    events.publish_on_commit([events.make_event('updated', Content(pk=content_id, author_id=author_id, updated_at=now))])
@@ -0,0 +1,49 @@
+"""
+Opt-in faster JSON renderer.
+
+Enable it by listing it first in REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].
+Its output is byte-for-byte what DRF's JSONRenderer produces for the same
+data; anything ujson can't encode (lazy strings, dates in untyped payloads,
+NaN) falls back to the stdlib encoder. So do payloads holding floats, which
+ujson formats differently (`1e-7` where the stdlib writes `1e-07`).
+"""
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import ujson
+except ImportError:  # The renderer then behaves exactly like JSONRenderer
+    ujson = None
+
+
+def has_float(data):
+    """ Whether a float appears anywhere in the (dict/list) payload. """
+    pending = [data]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, float):
+            return True
+        if isinstance(value, dict):
+            pending.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            pending.extend(value)
+    return False
+
+
+class UJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if data is None or ujson is None or indent is not None or not self.compact or has_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = ujson.dumps(
+                data,
+                ensure_ascii=self.ensure_ascii,
+                escape_forward_slashes=False,
+                allow_nan=not self.strict,
+                reject_bytes=True,
+            )
+        except (TypeError, ValueError, OverflowError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escaping as JSONRenderer: keep the output valid JavaScript.
+        return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode()
@@ -0,0 +1,207 @@
+"""
+Full-text search over ``Content``.
+
+On SQLite the index is an FTS5 table (``content_fts``) whose rowid is the
+content id, mapped by the unmanaged ``ContentSearchIndex`` model so searches
+compose with other filters and subqueries. Triggers on ``content_content``
+and ``content_documenttext`` keep it in sync, so ORM saves, deletes, bulk
+writes and extracted PDF text are all indexed without any Python-side
+bookkeeping.
+On PostgreSQL GIN expression indexes over the same columns and over the
+extracted text are used instead, each searched on its own and the matching
+ids combined with a UNION, so neither index is defeated by an OR across the
+join.
+Any other backend falls back to the original ``icontains`` scan.
+"""
+import re
+
+from django.db import connections
+from django.db.models import F, Q
+
+FTS_TABLE = 'content_fts'
+SEARCH_FIELDS = ('title', 'body', 'summary', 'categories')
+# bm25() column weights, in FTS column order (SEARCH_FIELDS, then the text of
+# the attached PDF): title hits rank highest, hits deep in a PDF lowest.
+SEARCH_WEIGHTS = (10.0, 1.0, 4.0, 2.0, 0.5)
+POSTGRES_CONFIG = 'english'
+POSTGRES_INDEX_NAME = 'content_search_gin'
+POSTGRES_TEXT_INDEX_NAME = 'content_document_text_search_gin'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+SQLITE_SCHEMA = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, body, summary, categories, document_text,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON content_content BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body, summary, categories, document_text)
+        VALUES (new.id, new.title, new.body, new.summary, new.categories, '');
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON content_content BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF title, body, summary, categories ON content_content BEGIN
+        UPDATE {FTS_TABLE}
+        SET title = new.title, body = new.body, summary = new.summary, categories = new.categories
+        WHERE rowid = old.id;
+    END
+    """,
+    # Persist the column weights so the FTS5 `rank` column applies them.
+    f"""
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank)
+    VALUES ('rank', 'bm25({', '.join(str(weight) for weight in SEARCH_WEIGHTS)})')
+    """,
+]
+
+# Text extracted from attached PDFs (content.extraction) is indexed too, once
+# `content_documenttext` exists (migration 0007).
+SQLITE_TEXT_SCHEMA = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_text_ai AFTER INSERT ON content_documenttext BEGIN
+        UPDATE {FTS_TABLE} SET document_text = new.text WHERE rowid = new.content_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_text_au AFTER UPDATE OF text ON content_documenttext BEGIN
+        UPDATE {FTS_TABLE} SET document_text = new.text WHERE rowid = new.content_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_text_ad AFTER DELETE ON content_documenttext BEGIN
+        UPDATE {FTS_TABLE} SET document_text = '' WHERE rowid = old.content_id;
+    END
+    """,
+]
+SQLITE_TRIGGERS = ['ai', 'ad', 'au', 'text_ai', 'text_au', 'text_ad']
+
+SQLITE_TEARDOWN = [
+    *(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{name}" for name in SQLITE_TRIGGERS),
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def build_match_expression(query):
+    """
+    Turn free text into an FTS5 query: every word must match, and the last
+    characters typed may be an incomplete word (prefix match). Only word
+    characters survive, so user input can never inject FTS5 syntax.
+    """
+    return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(query))
+
+
+def install_sqlite_index(cursor, rebuild=False):
+    """
+    Create the FTS5 table and its triggers if they are missing.
+
+    SQLite drops triggers whenever Django remakes ``content_content`` during a
+    migration, so this is idempotent and is re-run after every ``migrate``.
+    ``rebuild`` repopulates the index from the content table.
+    """
+    cursor.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'table' AND name = %s", ['content_documenttext'],
+    )
+    has_text = bool(cursor.fetchone()[0])
+    cursor.execute(
+        "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+        [f'{FTS_TABLE}_%'],
+    )
+    triggers_missing = cursor.fetchone()[0] < (len(SQLITE_TRIGGERS) if has_text else 3)
+    for statement in SQLITE_SCHEMA + (SQLITE_TEXT_SCHEMA if has_text else []):
+        cursor.execute(statement)
+    if rebuild or triggers_missing:
+        # Rows written while the triggers were gone would otherwise be stale.
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        if has_text:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, body, summary, categories, document_text) "
+                f"SELECT c.id, c.title, c.body, c.summary, c.categories, coalesce(t.text, '') "
+                f"FROM content_content c LEFT JOIN content_documenttext t ON t.content_id = c.id"
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, body, summary, categories, document_text) "
+                f"SELECT id, title, body, summary, categories, '' FROM content_content"
+            )
+
+
+def _postgres_vector():
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector(*SEARCH_FIELDS, config=POSTGRES_CONFIG)
+
+
+def _postgres_text_vector():
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector('text', config=POSTGRES_CONFIG)
+
+
+def postgres_index():
+    """GIN index matching the expression used by ``search_contents``."""
+    from django.contrib.postgres.indexes import GinIndex
+    return GinIndex(_postgres_vector(), name=POSTGRES_INDEX_NAME)
+
+
+def postgres_text_index():
+    """GIN index on ``DocumentText`` matching the extracted-text search."""
+    from django.contrib.postgres.indexes import GinIndex
+    return GinIndex(_postgres_text_vector(), name=POSTGRES_TEXT_INDEX_NAME)
+
+
+def _search_sqlite(queryset, query):
+    match = build_match_expression(query)
+    if not match:
+        return queryset.none()
+    return (
+        queryset.filter(search_index__document__match=match)
+        .annotate(search_rank=F('search_index__rank'))
+        .order_by('search_rank', 'id')
+    )
+
+
+def _search_postgres(queryset, query):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+    Content = queryset.model
+    DocumentText = Content._meta.get_field('document_text').related_model
+    search_query = SearchQuery(query, config=POSTGRES_CONFIG, search_type='websearch')
+    matches = (
+        Content._base_manager.annotate(search_vector=_postgres_vector())
+        .filter(search_vector=search_query).values('pk')
+        .union(
+            DocumentText._base_manager.annotate(search_vector=_postgres_text_vector())
+            .filter(search_vector=search_query).values('content_id')
+        )
+    )
+    vector = _postgres_vector() + SearchVector('document_text__text', config=POSTGRES_CONFIG, weight='D')
+    return (
+        queryset.filter(pk__in=matches)
+        .annotate(search_rank=SearchRank(vector, search_query))
+        .order_by('-search_rank', 'id')
+    )
+
+
+def _search_fallback(queryset, query):
+    condition = Q()
+    for field in (*SEARCH_FIELDS, 'document_text__text'):
+        condition |= Q(**{f'{field}__icontains': query})
+    return queryset.filter(condition)
+
+
+def search_contents(queryset, query):
+    """
+    Restrict ``queryset`` to items matching ``query``, best matches first.
+    Any filtering already applied (author scoping) is preserved.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        return _search_sqlite(queryset, query)
+    if vendor == 'postgresql':
+        return _search_postgres(queryset, query)
+    return _search_fallback(queryset, query)
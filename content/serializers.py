@@ -1,8 +1,115 @@
-from rest_framework import serializers
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 from .models import Content
 
+def get_fieldset(request):
+    """
+    The ContentSerializer fields picked by `?fields=` and/or `?exclude=`
+    (comma-separated names), in serializer order; None when neither is given.
+    """
+    available = ContentSerializer.Meta.fields
+    chosen, excluded = ([name.strip() for name in request.query_params.get(param, '').split(',') if name.strip()]
+                        for param in ('fields', 'exclude'))
+    if not chosen and not excluded:
+        return None
+    unknown = [name for name in chosen + excluded if name not in available]
+    if unknown:
+        raise serializers.ValidationError({'fields': [
+            f"Unknown field(s): {', '.join(unknown)}. Choose from: {', '.join(available)}."
+        ]})
+    return [name for name in available if (not chosen or name in chosen) and name not in excluded]
+
+
 class ContentSerializer(serializers.ModelSerializer):
+    """
+    Pass `fields=[...]` to output only those fields (sparse fieldsets).
+    `document_info` is the document's page count, size, title and preview
+    URL (see `content.previews`), or None until they are ready.
+    """
+    document_info = serializers.JSONField(source='document_preview.info', read_only=True)
+
     class Meta:
         model = Content
-        fields = ['id', 'author', 'title', 'body', 'summary', 'categories', 'document', 'created_at', 'updated_at']
+        fields = [
+            'id', 'author', 'title', 'body', 'summary', 'categories', 'document', 'document_info',
+            'created_at', 'updated_at',
+        ]
         read_only_fields = ['id', 'author', 'created_at', 'updated_at']
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class ContentRowSerializer:
+    """
+    Read-only fast path producing exactly `ContentSerializer(...).data` from
+    `.values(*ContentRowSerializer.columns())` rows.
+    Converters are worked out once per call from ContentSerializer's fields,
+    so a row costs one dict build instead of a model instance and a
+    serializer field walk.
+    """
+    serializer_class = ContentSerializer
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.fields = fields
+
+    @property
+    def data(self):
+        accessors = self.get_accessors(self.fields)
+        results = []
+        for row in self.rows:
+            item = {}
+            for name, column, convert in accessors:
+                value = row[column]
+                item[name] = value if convert is None or value is None else convert(value)
+            results.append(item)
+        return results
+
+    @classmethod
+    def columns(cls, fields=None):
+        """
+        The model columns behind `fields` (all serializer fields by default),
+        with related ones spelled as lookups, e.g. `document_preview__info`.
+        """
+        return ['__'.join(field.source_attrs) for field in cls.serializer_class(fields=fields).fields.values()]
+
+    @classmethod
+    def get_accessors(cls, fields=None):
+        """
+        (output name, values() column, converter or None) per serializer field.
+        """
+        return [
+            (name, '__'.join(field.source_attrs), cls.converter_for(field))
+            for name, field in cls.serializer_class(fields=fields).fields.items()
+        ]
+
+    @staticmethod
+    def converter_for(field):
+        if isinstance(field, serializers.FileField) and not field.context.get('request'):
+            storage = Content._meta.get_field(field.source).storage
+            # FieldFile.url without building a FieldFile; empty names serialize as None
+            return lambda name: storage.url(name) if name else None
+        if isinstance(field, serializers.DateTimeField):
+            output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            if not (isinstance(output_format, str) and output_format.lower() == ISO_8601):
+                return field.to_representation
+            tz = getattr(field, 'timezone', field.default_timezone())
+
+            def isoformat(value):
+                if tz is not None and timezone.is_aware(value):
+                    value = value.astimezone(tz)
+                else:
+                    value = field.enforce_timezone(value)
+                value = value.isoformat()
+                return value[:-6] + 'Z' if value.endswith('+00:00') else value
+            return isoformat
+        if type(field) in (
+            serializers.CharField, serializers.IntegerField, serializers.PrimaryKeyRelatedField, serializers.JSONField,
+        ):
+            return None  # Values from the database are already the representation
+        return field.to_representation
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Sent inside the transaction after bulk writes that bypass post_save
+# (bulk_create/bulk_update). Arguments: `created` and `updated`, lists of
+# Content instances, and `update_fields`, the fields written on `updated`.
+# Bulk deletes go through post_delete as usual.
+contents_bulk_saved = Signal()
@@ -0,0 +1,301 @@
+"""
+Per-author and per-category content statistics for the admin dashboard.
+
+`AuthorStats` (content and document counts, newest `created_at` and
+`updated_at`), `CategoryStats` (content count) and the `ContentTotals` rows
+(authors with content, content and document counts) are adjusted with F() expressions by the Content signal handlers in
+`content.models`, inside the writing transaction, so they commit or roll
+back with the change and `GET /api/content/stats/` never counts a table. Writes that skip
+those signals (raw SQL, `QuerySet.update()`) leave them drifting;
+`manage.py content_stats` checks for drift and rebuilds them from scratch.
+
+The totals are spread over TOTALS_SLOTS rows, each covering the authors
+whose id falls in its slot, and summed on read. A write then locks a slot
+row next to its author's row rather than one row every writer waits on.
+"""
+from django.apps import apps
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+
+HAS_DOCUMENT = Q(document__isnull=False) & ~Q(document='')
+
+AUTHOR_FIELDS = {'content_count': 0, 'document_count': 0, 'last_created_at': None, 'last_updated_at': None}
+CATEGORY_FIELDS = {'content_count': 0}
+TOTALS_FIELDS = {'author_count': 0, 'content_count': 0, 'document_count': 0}
+TOTALS_SLOTS = 16  # Changing it needs `manage.py content_stats --rebuild`
+
+
+def _add(field, delta):
+    """ `field` + `delta`, never below zero so drift can't break a write. """
+    if delta > 0:
+        return F(field) + delta
+    return Greatest(F(field) + delta, Value(0))
+
+
+def _latest(field, value):
+    """ `field` moved forward to `value` if that is newer (or `field` is NULL). """
+    value = Value(value, output_field=models.DateTimeField())
+    return Greatest(Coalesce(F(field), value), value)
+
+
+def _newest(field, removed):
+    """
+    `field` (`last_created_at`/`last_updated_at`), re-read from the author's
+    remaining content if the removed item, saved at `removed`, was the newest.
+    Served by the (author, created_at/updated_at) indexes.
+    """
+    column = field.removeprefix('last_')
+    remaining = apps.get_model('content', 'Content').objects.filter(author_id=OuterRef('author_id'))
+    return Case(
+        When(**{f'{field}__lte': removed}, then=Subquery(remaining.order_by(f'-{column}').values(column)[:1])),
+        default=F(field),
+    )
+
+
+def totals_slot(author_id):
+    """ The totals row counting `author_id`. """
+    return author_id % TOTALS_SLOTS
+
+
+def add_totals(author_id, authors=0, contents=0, documents=0):
+    """
+    Adjust the totals row of `author_id`'s slot, creating it on first use.
+    """
+    ContentTotals = apps.get_model('content', 'ContentTotals')
+    deltas = {'author_count': authors, 'content_count': contents, 'document_count': documents}
+    changes = {field: _add(field, delta) for field, delta in deltas.items() if delta}
+    slot = totals_slot(author_id)
+    rows = ContentTotals.objects.filter(slot=slot)
+    if changes and not rows.update(**changes):
+        ContentTotals.objects.bulk_create([ContentTotals(slot=slot)], ignore_conflicts=True)
+        rows.update(**changes)
+
+
+def get_totals():
+    """
+    The totals summed over their slot rows: at most TOTALS_SLOTS rows read,
+    however many authors or items there are.
+    """
+    totals = apps.get_model('content', 'ContentTotals').objects.aggregate(
+        **{field: Sum(field) for field in TOTALS_FIELDS}
+    )
+    return {field: value or 0 for field, value in totals.items()}
+
+
+def _update_author(author_id, changes, contents):
+    """
+    Apply `changes` to an author's row. Returns how the number of authors
+    with content changes (1 for their first item, -1 for their last), or
+    None if they have no row. The content count is matched in the UPDATE
+    itself, so concurrent writes can't both see the same transition.
+    """
+    rows = apps.get_model('content', 'AuthorStats').objects.filter(author_id=author_id)
+    if contents > 0 and rows.filter(content_count=0).update(**changes):
+        return 1
+    if contents < 0 and rows.filter(content_count=-contents).update(**changes):
+        return -1
+    return 0 if rows.update(**changes) else None
+
+
+def add_author_stats(author_id, contents=0, documents=0, created_at=None, updated_at=None):
+    """
+    Adjust an author's counts and move their activity times forward,
+    creating their row on first use, and the totals with them.
+    """
+    AuthorStats = apps.get_model('content', 'AuthorStats')
+    changes = {}
+    if contents:
+        changes['content_count'] = _add('content_count', contents)
+    if documents:
+        changes['document_count'] = _add('document_count', documents)
+    if created_at:
+        changes['last_created_at'] = _latest('last_created_at', created_at)
+    if updated_at:
+        changes['last_updated_at'] = _latest('last_updated_at', updated_at)
+    if not changes:
+        return
+    authors = _update_author(author_id, changes, contents)
+    if authors is None:
+        # A row another transaction creates meanwhile is kept, so no change is lost
+        AuthorStats.objects.bulk_create([AuthorStats(author_id=author_id)], ignore_conflicts=True)
+        authors = _update_author(author_id, changes, contents)
+    add_totals(author_id, authors, contents, documents)
+
+
+def remove_author_stats(author_id, had_document, created_at, updated_at):
+    """
+    Uncount an item deleted, or moved to another author, after the write.
+    Never creates rows: when an author is deleted, theirs may already be gone
+    (and `author_deleting` has uncounted them from the totals).
+    """
+    changes = {
+        'content_count': _add('content_count', -1),
+        'last_created_at': _newest('last_created_at', created_at),
+        'last_updated_at': _newest('last_updated_at', updated_at),
+    }
+    if had_document:
+        changes['document_count'] = _add('document_count', -1)
+    authors = _update_author(author_id, changes, -1)
+    add_totals(author_id, authors or 0, -1, -int(had_document))
+
+
+def author_deleting(author_id):
+    """
+    Uncount an author being deleted from the totals before their content
+    goes. Their row is emptied so the content deletions that follow don't
+    uncount them again, whichever of the two the cascade deletes first.
+    """
+    emptied = apps.get_model('content', 'AuthorStats').objects.filter(
+        author_id=author_id, content_count__gt=0,
+    ).update(content_count=0, document_count=0)
+    if emptied:
+        add_totals(author_id, authors=-1)
+
+
+def add_category_counts(deltas):
+    """
+    Add `deltas[category_id]` to each category's content count, with one
+    UPDATE per distinct delta.
+    """
+    CategoryStats = apps.get_model('content', 'CategoryStats')
+    by_delta = {}
+    for category_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(category_id)
+    for delta, category_ids in sorted(by_delta.items()):
+        if delta > 0:
+            CategoryStats.objects.bulk_create(
+                [CategoryStats(category_id=category_id) for category_id in category_ids], ignore_conflicts=True,
+            )
+        CategoryStats.objects.filter(category_id__in=category_ids).update(content_count=_add('content_count', delta))
+
+
+def content_saved(content, created, previous=None):
+    """
+    Count a saved content item. `previous` is the `(author_id, has_document)`
+    it was loaded with, None if unknown; `has_document` is None when the
+    document wasn't loaded (and so wasn't saved either).
+    """
+    has_document = bool(content.document) if 'document' in content.__dict__ else None
+    previous_author_id, had_document = previous or (content.author_id, has_document)
+    previous_author_id = previous_author_id or content.author_id  # Deferred: not saved either
+    if created:
+        add_author_stats(content.author_id, contents=1, documents=int(bool(has_document)),
+                         created_at=content.created_at, updated_at=content.updated_at)
+    elif previous_author_id != content.author_id:
+        remove_author_stats(previous_author_id, bool(had_document), content.created_at, content.updated_at)
+        add_author_stats(content.author_id, contents=1, documents=int(bool(has_document)),
+                         created_at=content.created_at, updated_at=content.updated_at)
+    else:
+        documents = 0 if has_document is None or had_document is None else has_document - had_document
+        add_author_stats(content.author_id, documents=documents, updated_at=content.updated_at)
+
+
+def content_deleted(content):
+    remove_author_stats(content.author_id, bool(content.document), content.created_at, content.updated_at)
+
+
+def content_deleting(content):
+    """
+    Uncount an item's categories before its links are deleted with it.
+    """
+    apps.get_model('content', 'CategoryStats').objects.filter(category__contents=content).update(
+        content_count=_add('content_count', -1),
+    )
+
+
+def contents_bulk_saved(created, updated):
+    """
+    Count bulk-created items and the activity of bulk-updated ones (which
+    keep their author and document), with one UPDATE per author.
+    """
+    authors = {}
+    for items, is_new in ((created, True), (updated, False)):
+        for content in items:
+            stats = authors.setdefault(content.author_id, {'contents': 0, 'documents': 0, 'created_at': None,
+                                                           'updated_at': None})
+            if is_new:
+                stats['contents'] += 1
+                stats['documents'] += bool(content.document)
+                stats['created_at'] = max(filter(None, (stats['created_at'], content.created_at)))
+            stats['updated_at'] = max(filter(None, (stats['updated_at'], content.updated_at)))
+    for author_id, stats in authors.items():
+        add_author_stats(author_id, **stats)
+
+
+def compute():
+    """
+    The statistics as they should be, counted from the Content table:
+    `({author_id: {field: value}}, {category_id: {field: value}}, {slot: {field: value}})`.
+    """
+    Content = apps.get_model('content', 'Content')
+    authors = {
+        row.pop('author_id'): row
+        for row in Content.objects.order_by().values('author_id').annotate(
+            content_count=Count('id'), document_count=Count('id', filter=HAS_DOCUMENT),
+            last_created_at=Max('created_at'), last_updated_at=Max('updated_at'),
+        )
+    }
+    Link = Content.category_set.through
+    categories = {
+        row.pop('category_id'): row
+        for row in Link.objects.order_by().values('category_id').annotate(content_count=Count('id'))
+    }
+    totals = {}
+    for author_id, row in authors.items():
+        slot = totals.setdefault(totals_slot(author_id), dict(TOTALS_FIELDS))
+        slot['author_count'] += 1
+        slot['content_count'] += row['content_count']
+        slot['document_count'] += row['document_count']
+    return authors, categories, totals
+
+
+def _diff(model, key, expected, empty):
+    stored = {row.pop(key): row for row in model.objects.values(key, *empty)}
+    drift = []
+    for value in sorted(set(stored) | set(expected)):
+        want = expected.get(value, empty)
+        have = stored.get(value)
+        if have != want and not (have is None and want == empty):
+            drift.append({key: value, 'stored': have, 'expected': want})
+    return drift
+
+
+def find_drift():
+    """
+    Compare the stored statistics with `compute()`. Returns
+    `{'authors': [...], 'categories': [...], 'totals': [...]}`, each entry
+    holding the key, the stored values (None for a missing row) and the
+    expected ones.
+    """
+    expected_authors, expected_categories, expected_totals = compute()
+    return {
+        'authors': _diff(apps.get_model('content', 'AuthorStats'), 'author_id', expected_authors, AUTHOR_FIELDS),
+        'categories': _diff(apps.get_model('content', 'CategoryStats'), 'category_id', expected_categories,
+                            CATEGORY_FIELDS),
+        'totals': _diff(apps.get_model('content', 'ContentTotals'), 'slot', expected_totals, TOTALS_FIELDS),
+    }
+
+
+@transaction.atomic
+def rebuild(batch_size=500):
+    """
+    Replace the statistics with `compute()`. Returns the number of author
+    and category rows written.
+    """
+    AuthorStats = apps.get_model('content', 'AuthorStats')
+    CategoryStats = apps.get_model('content', 'CategoryStats')
+    ContentTotals = apps.get_model('content', 'ContentTotals')
+    authors, categories, totals = compute()
+    AuthorStats.objects.all().delete()
+    CategoryStats.objects.all().delete()
+    ContentTotals.objects.all().delete()
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(author_id=key, **values) for key, values in authors.items()], batch_size=batch_size,
+    )
+    CategoryStats.objects.bulk_create(
+        [CategoryStats(category_id=key, **values) for key, values in categories.items()], batch_size=batch_size,
+    )
+    ContentTotals.objects.bulk_create([ContentTotals(slot=key, **values) for key, values in totals.items()])
+    return len(authors), len(categories)
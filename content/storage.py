@@ -0,0 +1,120 @@
+"""
+Content-addressed storage for uploaded documents.
+
+Uploads are hashed in chunks while they stream to a temporary file, then
+moved to `documents/<aa>/<sha256>.pdf`. Identical uploads therefore share one
+file on disk, tracked by a `DocumentBlob` row whose `ref_count` is the number
+of `Content` rows pointing at it.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is the content hash, so the upload name never collides.
+        return name
+
+    def _save(self, name, content):
+        directory, filename = os.path.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        os.makedirs(self.path(directory), exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.path(directory), suffix='.upload')
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            sha256 = digest.hexdigest()
+            blob_name = f'{directory}/{sha256[:2]}/{sha256}{extension}'
+            self._store_blob(blob_name, sha256, size, temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return blob_name
+
+    def _store_blob(self, name, sha256, size, temp_path):
+        """
+        Take a reference on the blob `name`, moving the upload into place if
+        the blob is new. The row lock keeps this from interleaving with a
+        release that is deleting the same blob. `Content.save` runs this in
+        the transaction that writes the row, so the reference commits or
+        rolls back with it.
+        """
+        DocumentBlob = apps.get_model('content', 'DocumentBlob')
+        with transaction.atomic():
+            blob, created = DocumentBlob.objects.select_for_update().get_or_create(
+                name=name, defaults={'sha256': sha256, 'size': size, 'ref_count': 1},
+            )
+            if not created:
+                DocumentBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') + 1)
+            path = self.path(name)
+            if created or not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+                if self.file_permissions_mode is not None:
+                    os.chmod(path, self.file_permissions_mode)
+
+    def release(self, name):
+        """
+        Drop one reference to `name`, deleting the file with its last reference.
+        """
+        self.release_many({name: 1})
+
+    def release_many(self, counts):
+        """
+        Drop `counts[name]` references to each name, deleting files whose
+        last reference goes. Files are deleted while their blob rows are
+        locked, so an upload of the same bytes can't slip in between.
+        Files from before content addressing have no blob row and are deleted
+        once no content row points at them.
+        """
+        DocumentBlob = apps.get_model('content', 'DocumentBlob')
+        Content = apps.get_model('content', 'Content')
+        with transaction.atomic():
+            blobs = list(DocumentBlob.objects.select_for_update().filter(name__in=counts))
+            unused = []
+            for blob in blobs:
+                if blob.ref_count > counts[blob.name]:
+                    DocumentBlob.objects.filter(pk=blob.pk).update(ref_count=F('ref_count') - counts[blob.name])
+                else:
+                    unused.append(blob)
+            DocumentBlob.objects.filter(pk__in=[blob.pk for blob in unused]).delete()
+
+            legacy = set(counts) - {blob.name for blob in blobs}
+            if legacy:
+                legacy -= set(Content.objects.filter(document__in=legacy).values_list('document', flat=True))
+            for name in [blob.name for blob in unused] + sorted(legacy):
+                self.delete(name)
+
+    def delete_unreferenced(self, name):
+        """
+        Delete `name` unless a blob or content row refers to it. Returns
+        whether it was deleted.
+        """
+        DocumentBlob = apps.get_model('content', 'DocumentBlob')
+        Content = apps.get_model('content', 'Content')
+        with transaction.atomic():
+            if DocumentBlob.objects.select_for_update().filter(name=name).exists():
+                return False
+            if Content.objects.filter(document=name).exists():
+                return False
+            self.delete(name)
+            return True
+
+
+def document_storage():
+    return ContentAddressedStorage()
@@ -0,0 +1,95 @@
+"""
+Synthetic content for `seed_bulk`, `bench` and `replay_traffic`.
+
+Words, categories and authorship follow Zipf-like distributions, so a few
+categories and authors dominate and search terms range from very common to
+rare, roughly like real editorial data.
+"""
+import itertools
+import random
+
+WORDS = (
+    'report market policy energy climate health data city water school research study '
+    'election budget science software security travel design music history museum football '
+    'coastal transit housing vaccine startup satellite archive festival harvest quantum '
+    'wildfire glacier pipeline tariff orchestra manuscript volcano telescope monsoon lithium '
+    'cathedral regatta origami falconry marathon typhoon sonnet bazaar zeppelin'
+).split()
+CATEGORIES = (
+    'News', 'Technology', 'Science', 'Politics', 'Business', 'Health', 'Sports', 'Culture',
+    'Travel', 'Education', 'Environment', 'Opinion', 'Finance', 'Music', 'Art', 'History',
+    'Food', 'Design', 'Space', 'Law', 'Energy', 'Transport', 'Housing', 'Weather',
+)
+
+
+def zipf_weights(count, exponent=1.1):
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+class ContentFaker:
+    """
+    Generates field values for Content rows, within the model's max lengths.
+    """
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self.word_weights = zipf_weights(len(WORDS))
+        self.category_weights = zipf_weights(len(CATEGORIES))
+
+    def words(self, count):
+        return self.random.choices(WORDS, cum_weights=self.word_weights, k=count)
+
+    def sentence(self, max_length):
+        text = ' '.join(self.words(self.random.randint(3, 60))).capitalize()
+        return text[:max_length].rsplit(' ', 1)[0] if len(text) > max_length else text
+
+    def title(self):
+        return self.sentence(30)
+
+    def summary(self):
+        return self.sentence(60)
+
+    def body(self):
+        # Mostly short bodies with a long tail up to the 300 character limit
+        length = min(300, int(self.random.lognormvariate(4.5, 0.6)))
+        return self.sentence(max(length, 20))
+
+    def categories(self):
+        count = self.random.choices((1, 2, 3, 4), weights=(45, 35, 15, 5))[0]
+        names = dict.fromkeys(self.random.choices(CATEGORIES, cum_weights=self.category_weights, k=count))
+        return ', '.join(names)[:100]
+
+    def search_term(self):
+        return self.random.choice(WORDS)
+
+    def pick(self, items, weights):
+        return self.random.choices(items, cum_weights=weights)[0]
+
+
+def make_pdf(text='Benchmark', size=None):
+    """
+    A small valid one-page PDF, for upload benchmarks. With `size`, it is
+    padded with a trailing comment to about that many bytes.
+    """
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R >> >> >>',
+        None,
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    stream = b'BT /F1 12 Tf 10 100 Td (' + text.encode() + b') Tj ET'
+    objects[3] = b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream'
+    pdf = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    if size and size > len(pdf) + 2:
+        pdf += b'%' + b'0' * (size - len(pdf) - 2) + b'\n'
+    return pdf
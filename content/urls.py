@@ -1,7 +1,20 @@
+from django.conf import settings
 from django.urls import path
-from .views import ContentListCreateView, ContentDetailView
+from .views import ContentListCreateView, ContentDetailView, ContentDocumentView, ContentPreviewView, ContentBulkView, ContentChangesView, ContentStatsView
+
+if getattr(settings, 'CONTENT_ASYNC_VIEWS', False):
+    # Native async reads for ASGI; writes fall through to the DRF views
+    from .async_views import content_list_view, content_detail_view
+else:
+    content_list_view = ContentListCreateView.as_view()
+    content_detail_view = ContentDetailView.as_view()
 
 urlpatterns = [
-    path('', ContentListCreateView.as_view(), name='content-list-create'),
-    path('<int:pk>/', ContentDetailView.as_view(), name='content-detail'),
+    path('', content_list_view, name='content-list-create'),
+    path('bulk/', ContentBulkView.as_view(), name='content-bulk'),
+    path('changes/', ContentChangesView.as_view(), name='content-changes'),
+    path('stats/', ContentStatsView.as_view(), name='content-stats'),
+    path('<int:pk>/', content_detail_view, name='content-detail'),
+    path('<int:pk>/document/', ContentDocumentView.as_view(), name='content-document'),
+    path('<int:pk>/preview/', ContentPreviewView.as_view(), name='content-preview'),
 ]
@@ -1,7 +1,28 @@
 import os
 from django.core.exceptions import ValidationError
 
+PDF_MAGIC = b'%PDF-'
+
+
+def read_header(value, size=1024):
+    """
+    Read the first `size` bytes of an uploaded or stored file, leaving the
+    file position where it was.
+    """
+    file = getattr(value, 'file', value)
+    position = file.tell()
+    try:
+        file.seek(0)
+        return file.read(size)
+    finally:
+        file.seek(position)
+
+
 def validate_pdf(value):
     ext = os.path.splitext(value.name)[1]  # Get the file extension
     if ext.lower() != '.pdf':
         raise ValidationError("Only PDF files are allowed.")
+    # Trust the bytes, not the name: PDFs start with `%PDF-` (readers allow
+    # a little leading junk, so look within the first kilobyte like they do)
+    if PDF_MAGIC not in read_header(value):
+        raise ValidationError("Only PDF files are allowed.")
@@ -1,11 +1,140 @@
+import calendar
+
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.pagination import PageNumberPagination
-from .models import Content
-from .serializers import ContentSerializer
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.renderers import JSONRenderer
+from rest_framework.parsers import JSONParser
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.db.models import Count
+from cms_project.db.router import replica_reads
+from cms_project.metrics import timed
+from .models import AuthorStats, CategoryStats, Content, DocumentPreview
+from . import cache as content_cache, stats
+from .serializers import ContentRowSerializer, ContentSerializer, get_fieldset
+from .search import search_contents
+from .pagination import ORDERINGS, KeysetPagination, get_ordering, order_by_fields
+from .downloads import serve_document
+from .parsers import NDJSONParser
+from .previews import thumbnail_version
+from .changes import get_changes
+from .signals import contents_bulk_saved
+
+PREVIEW_INFO = 'document_preview__info'
+
+
+def category_facet_rows(contents):
+    """
+    Count items per category within `contents`, most common first.
+    """
+    links = Content.category_set.through.objects.filter(content__in=contents.values('id'))
+    return links.values('category__name').annotate(count=Count('id')).order_by('-count', 'category__name')
+
+
+def category_facets(contents):
+    return [{'name': row['category__name'], 'count': row['count']} for row in category_facet_rows(contents)]
+
+
+def version_headers(updated_at):
+    """
+    `ETag` and `Last-Modified` for a content item saved at `updated_at`.
+    The ETag is the save time in microseconds.
+    """
+    seconds = calendar.timegm(updated_at.utctimetuple())
+    return {'ETag': f'"{seconds * 1000000 + updated_at.microsecond:x}"', 'Last-Modified': http_date(seconds)}
+
+
+def is_conditional(request):
+    return 'HTTP_IF_NONE_MATCH' in request.META or 'HTTP_IF_MODIFIED_SINCE' in request.META
+
+
+def conditional_response(request, updated_at):
+    """
+    The 304 (GET/HEAD) or 412 response the request's conditional headers
+    call for against the item's version, or None to go ahead.
+    """
+    headers = version_headers(updated_at)
+    response = get_conditional_response(
+        request, etag=headers['ETag'], last_modified=calendar.timegm(updated_at.utctimetuple()),
+    )
+    if response is None:
+        return None
+    if response.status_code == status.HTTP_412_PRECONDITION_FAILED:
+        return Response({"detail": "Precondition failed: the content has changed."},
+                        status=status.HTTP_412_PRECONDITION_FAILED, headers=headers)
+    for name, value in headers.items():
+        response[name] = value
+    return response
+
+
+def list_queryset(request):
+    """
+    Content visible to `request.user`, searched, filtered and ordered by the
+    query string. Shared by the sync and async list views.
+    """
+    # Admin sees all content; authors see their own
+    if request.user.is_staff:
+        contents = Content.objects.all().order_by('id')  # Added ordering for pagination consistency
+    else:
+        contents = Content.objects.filter(author=request.user).order_by('id')  # Added ordering
+
+    # Apply search filter through the full-text index; best matches come first
+    search_query = request.query_params.get('search', '').strip()
+    if search_query:
+        contents = search_contents(contents, search_query)
+
+    # Exact category filter: an index lookup on the normalized categories
+    for category in request.query_params.getlist('category'):
+        contents = contents.filter(category_set__key=category.strip().casefold())
+
+    # An explicit ordering overrides relevance (the keyset paginator applies its own)
+    if 'ordering' in request.query_params and 'cursor' not in request.query_params:
+        contents = contents.order_by(*order_by_fields(*get_ordering(request)))
+    return contents
+
+
+def list_rows(request, contents):
+    """
+    `contents` as values() rows reading only the columns of the requested
+    fieldset. Returns the rows and the fieldset.
+    """
+    fields = get_fieldset(request)
+    columns = ContentRowSerializer.columns(fields)
+    if 'cursor' in request.query_params:
+        # The keyset paginator reads its position from the rows
+        columns += [field for field in ORDERINGS[get_ordering(request)[0]] if field not in columns]
+    return contents.values(*columns), fields
+
+
+def get_limit(request, default=100, maximum=1000):
+    """
+    `?limit=`, clamped to 1..`maximum`.
+    """
+    try:
+        return min(max(int(request.query_params.get('limit', default)), 1), maximum)
+    except ValueError:
+        raise ValidationError({'limit': ["A valid integer is required."]})
+
+
+def detail_queryset(contents, fields=None):
+    """
+    `contents` loading only the columns of the requested fieldset, with the
+    document preview's `info` joined in rather than fetched afterwards.
+    """
+    columns = ContentRowSerializer.columns(fields)
+    contents = contents.only('author', 'updated_at', *columns)
+    if PREVIEW_INFO in columns:
+        contents = contents.select_related('document_preview')
+    return contents
 
 
 class ContentListCreateView(APIView):
@@ -13,34 +142,41 @@ class ContentListCreateView(APIView):
     Handles listing and creating content items.
     - Admin users can view all content.
     - Authors can only view and create their own content.
-    - Supports search and pagination.
+    - Supports full-text search (ranked by relevance) and pagination.
+    - `?ordering=` sorts by `id`, `created_at` or `updated_at` (prefix `-` for descending).
+    - `?category=` filters on an exact category; `?facets=true` adds category counts.
+    - `?cursor=` switches to keyset pagination with opaque next/previous links.
+    - `?fields=`/`?exclude=` pick the returned fields; only their columns are read.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        paginator = PageNumberPagination()
-        paginator.page_size = 10  # Default page size (adjustable globally)
+        """
+        List content, served from the response cache or a read replica when possible.
+        """
+        key = content_cache.make_key('list', request)
+        with replica_reads(content_cache.replica_allowed(request.user)):
+            return Response(content_cache.get_or_build(key, lambda: self.list_data(request)))
 
-        # Admin sees all content; authors see their own
-        if request.user.is_staff:
-            contents = Content.objects.all().order_by('id')  # Added ordering for pagination consistency
+    def list_data(self, request):
+        # `?cursor=` opts into keyset pagination: no COUNT(*) and no OFFSET scan
+        if 'cursor' in request.query_params:
+            paginator = KeysetPagination()
         else:
-            contents = Content.objects.filter(author=request.user).order_by('id')  # Added ordering
-
-        # Apply search filter
-        search_query = request.query_params.get('search', '')
-        if search_query:
-            contents = contents.filter(
-                Q(title__icontains=search_query) |
-                Q(body__icontains=search_query) |
-                Q(summary__icontains=search_query) |
-                Q(categories__icontains=search_query)
-            )
-
-        # Paginate results
-        result_page = paginator.paginate_queryset(contents, request)
-        serializer = ContentSerializer(result_page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+            paginator = PageNumberPagination()
+            paginator.page_size = 10  # Default page size (adjustable globally)
+
+        # Paginate plain rows; ContentRowSerializer renders them like ContentSerializer, only faster
+        contents = list_queryset(request)
+        rows, fields = list_rows(request, contents)
+        result_page = paginator.paginate_queryset(rows, request)
+        with timed('serialize'):
+            data = paginator.get_paginated_response(ContentRowSerializer(result_page, fields=fields).data).data
+
+        # Category counts over the whole filtered listing, not just this page
+        if request.query_params.get('facets') in ('1', 'true'):
+            data['facets'] = {'categories': category_facets(contents)}
+        return data
 
     def post(self, request):
         """
@@ -64,17 +200,24 @@ class ContentDetailView(APIView):
     Handles retrieving, updating, and deleting individual content items.
     - Admin can access and modify all content.
     - Authors can only access and modify their own content.
+    - Responses carry `ETag`/`Last-Modified`: GET answers 304 to matching
+      `If-None-Match`/`If-Modified-Since`, and PUT/DELETE answer 412 when
+      `If-Match`/`If-Unmodified-Since` no longer match.
     """
     permission_classes = [IsAuthenticated]
 
-    def get_object(self, pk, user):
+    def get_object(self, pk, user, fields=None, lock=False):
         """
         Retrieve the content object if it exists and the user has access.
+        Only the columns for `fields` (all serializer fields by default) are loaded.
+        With `lock`, the whole row is loaded and locked until the surrounding
+        transaction ends.
         """
+        contents = Content.objects.select_for_update() if lock else detail_queryset(Content.objects.all(), fields)
         try:
-            content = Content.objects.get(pk=pk)
+            content = contents.get(pk=pk)
             # Admin can access all; authors can only access their own content
-            if user.is_staff or content.author == user:
+            if user.is_staff or content.author_id == user.pk:
                 return content
             return None
         except Content.DoesNotExist:
@@ -82,21 +225,59 @@ class ContentDetailView(APIView):
 
     def get(self, request, pk):
         """
-        Retrieve a single content item by ID.
+        Retrieve a single content item by ID, served from the response cache or a read replica when possible.
         """
-        content = self.get_object(pk, request.user)
-        if not content:
+        key = content_cache.make_key('detail', request, pk)
+        fields = get_fieldset(request)
+        with replica_reads(content_cache.replica_allowed(request.user)):
+            entry = content_cache.get_cached(key)
+            if entry is None and is_conditional(request):
+                # Revalidate from one column before building the body
+                updated_at = self.get_version(pk, request.user)
+                if updated_at is None:
+                    return Response({"detail": "Not found or unauthorized."}, status=status.HTTP_404_NOT_FOUND)
+                not_modified = conditional_response(request, updated_at)
+                if not_modified is not None:
+                    return not_modified
+            if entry is None:
+                entry = content_cache.get_or_build(key, lambda: self.detail_data(pk, request.user, fields))
+        if entry is None:
             return Response({"detail": "Not found or unauthorized."}, status=status.HTTP_404_NOT_FOUND)
-        serializer = ContentSerializer(content)
-        return Response(serializer.data)
+        return conditional_response(request, entry['updated_at']) or Response(
+            entry['data'], headers=version_headers(entry['updated_at']),
+        )
+
+    def get_version(self, pk, user):
+        """
+        `updated_at` of an item the user may access, or None. Reads that one
+        column, so conditional requests are answered without loading the row.
+        """
+        contents = Content.objects.filter(pk=pk)
+        if not user.is_staff:
+            contents = contents.filter(author_id=user.pk)
+        return contents.values_list('updated_at', flat=True).first()
 
+    def detail_data(self, pk, user, fields=None):
+        """
+        The serialized item with its `updated_at`, as cached; None if not found.
+        """
+        content = self.get_object(pk, user, fields)
+        if not content:
+            return None
+        with timed('serialize'):
+            return {'updated_at': content.updated_at, 'data': ContentSerializer(content, fields=fields).data}
+
+    @transaction.atomic
     def put(self, request, pk):
         """
         Update a content item by ID. Only PDF files are allowed for the document field.
         """
-        content = self.get_object(pk, request.user)
+        content = self.get_object(pk, request.user, lock=True)
         if not content:
             return Response({"detail": "Not found or unauthorized."}, status=status.HTTP_404_NOT_FOUND)
+        precondition_failed = conditional_response(request, content.updated_at)
+        if precondition_failed is not None:
+            return precondition_failed
 
         serializer = ContentSerializer(content, data=request.data, partial=True)
         if serializer.is_valid():
@@ -107,17 +288,251 @@ class ContentDetailView(APIView):
             
             # Save updates to the content item
             serializer.save()
-            return Response(serializer.data)
+            return Response(serializer.data, headers=version_headers(serializer.instance.updated_at))
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @transaction.atomic
     def delete(self, request, pk):
         """
         Delete a content item by ID.
         """
-        content = self.get_object(pk, request.user)
+        content = self.get_object(pk, request.user, lock=True)
         if not content:
             return Response({"detail": "Not found or unauthorized."}, status=status.HTTP_404_NOT_FOUND)
+        precondition_failed = conditional_response(request, content.updated_at)
+        if precondition_failed is not None:
+            return precondition_failed
         
         # Delete the content item
         content.delete()
         return Response({"detail": "Content deleted."}, status=status.HTTP_204_NO_CONTENT)
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    File downloads answer with the file's own type whatever `Accept` says;
+    JSON is only used for error bodies.
+    """
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+
+class ContentDocumentView(ContentDetailView):
+    """
+    Downloads the PDF attached to a content item.
+    - Same access rules as the detail view.
+    - Supports `Range` (206), `If-None-Match` (304) and proxy offload
+      through `X-Sendfile`/`X-Accel-Redirect` (see CONTENT_DOCUMENT_SENDFILE).
+    """
+    http_method_names = ['get', 'head', 'options']
+    renderer_classes = [JSONRenderer]
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    def get(self, request, pk):
+        content = self.get_object(pk, request.user)
+        if not content:
+            return Response({"detail": "Not found or unauthorized."}, status=status.HTTP_404_NOT_FOUND)
+        if not content.document:
+            return Response({"detail": "This content has no document."}, status=status.HTTP_404_NOT_FOUND)
+        return serve_document(request, content)
+
+
+class ContentPreviewView(APIView):
+    """
+    Serves the first-page JPEG thumbnail of a content item's document.
+    - Same access rules as the detail view.
+    - 404 while the preview is pending or when none could be rendered.
+    - The URL in `document_info` changes with the image, so it is cacheable;
+      `If-None-Match` still gets a 304.
+    """
+    permission_classes = [IsAuthenticated]
+    http_method_names = ['get', 'head', 'options']
+    renderer_classes = [JSONRenderer]
+    content_negotiation_class = IgnoreClientContentNegotiation
+
+    def get(self, request, pk):
+        previews = DocumentPreview.objects.filter(content_id=pk, status=DocumentPreview.DONE)
+        if not request.user.is_staff:
+            previews = previews.filter(content__author_id=request.user.pk)
+        thumbnail = previews.values_list('thumbnail', flat=True).first()
+        if not thumbnail:
+            return Response({"detail": "No preview available."}, status=status.HTTP_404_NOT_FOUND)
+        etag = f'"{thumbnail_version(thumbnail)}"'
+        headers = {'ETag': etag, 'Cache-Control': 'private, max-age=86400'}
+        return get_conditional_response(request, etag=etag) or HttpResponse(
+            bytes(thumbnail), content_type='image/jpeg', headers=headers,
+        )
+
+
+class ContentBulkView(APIView):
+    """
+    Applies a batch of content operations in a single transaction.
+    - Body: a JSON array, or NDJSON (`application/x-ndjson`), of operations:
+      `{"op": "create", ...fields}`, `{"op": "update", "id": 1, ...fields}`, `{"op": "delete", "id": 1}`.
+    - Updates and deletes follow the same ownership rules as the detail view.
+    - Every item is validated first; if any item fails, nothing is written and
+      the errors are reported per item. Documents can't be changed in bulk.
+    - Updated and deleted rows are locked (`SELECT ... FOR UPDATE`) from
+      validation to commit, and each update writes only the fields it sets.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, NDJSONParser]
+
+    def post(self, request):
+        operations = request.data
+        if not isinstance(operations, list):
+            return Response({"detail": "Expected a list of operations."}, status=status.HTTP_400_BAD_REQUEST)
+        max_items = getattr(settings, 'CONTENT_BULK_MAX_ITEMS', 1000)
+        if len(operations) > max_items:
+            return Response({"detail": f"At most {max_items} operations per batch."}, status=status.HTTP_400_BAD_REQUEST)
+
+        errors = {}
+        creates, updates, deletes = [], [], []  # (index, id, fields)
+        seen = set()
+        for index, item in enumerate(operations):
+            if not isinstance(item, dict):
+                errors[index] = {"non_field_errors": ["Expected an object."]}
+                continue
+            fields = dict(item)
+            op = fields.pop('op', 'create')
+            pk = fields.pop('id', None)
+            if 'document' in fields:
+                errors[index] = {"document": ["Documents can't be changed in bulk."]}
+            elif op == 'create':
+                creates.append((index, None, fields))
+            elif op not in ('update', 'delete'):
+                errors[index] = {"op": ['Must be "create", "update" or "delete".']}
+            elif not isinstance(pk, int) or isinstance(pk, bool):
+                errors[index] = {"id": ["A valid integer is required."]}
+            elif pk in seen:
+                errors[index] = {"id": ["Each item can only be changed once per batch."]}
+            else:
+                seen.add(pk)
+                (updates if op == 'update' else deletes).append((index, pk, fields))
+
+        # Creates are validated together
+        create_serializer = ContentSerializer(data=[fields for _, _, fields in creates], many=True)
+        if creates and not create_serializer.is_valid():
+            for (index, _, _), item_errors in zip(creates, create_serializer.errors):
+                if item_errors:
+                    errors[index] = item_errors
+
+        with transaction.atomic():
+            # Updates and deletes only reach content the user may change. The
+            # rows stay locked until commit, so no other write lands between
+            # validating them and saving.
+            targets = Content.objects.select_for_update().filter(pk__in=seen)
+            if not request.user.is_staff:
+                targets = targets.filter(author=request.user)
+            targets = targets.in_bulk()
+            update_serializers = []
+            for index, pk, fields in updates + deletes:
+                if pk not in targets:
+                    errors[index] = {"detail": "Not found or unauthorized."}
+            for index, pk, fields in updates:
+                if pk in targets:
+                    serializer = ContentSerializer(targets[pk], data=fields, partial=True)
+                    if serializer.is_valid():
+                        update_serializers.append(serializer)
+                    else:
+                        errors[index] = serializer.errors
+
+            if errors:
+                return Response(
+                    {"errors": [{"index": index, "errors": errors[index]} for index in sorted(errors)]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            created = []
+            if creates:
+                created = Content.objects.bulk_create(
+                    [Content(author=request.user, **data) for data in create_serializer.validated_data],
+                    batch_size=500,
+                )
+
+            # One bulk_update per set of changed fields, so each row only gets its own fields written
+            updated, by_fields, now = [], {}, timezone.now()
+            for serializer in update_serializers:
+                for attr, value in serializer.validated_data.items():
+                    setattr(serializer.instance, attr, value)
+                serializer.instance.updated_at = now  # bulk_update skips auto_now
+                fields = tuple(sorted({'updated_at', *serializer.validated_data}))
+                by_fields.setdefault(fields, []).append(serializer.instance)
+                updated.append(serializer.instance)
+            for fields, instances in by_fields.items():
+                Content.objects.bulk_update(instances, fields, batch_size=500)
+            update_fields = set().union(*by_fields)
+
+            if deletes:
+                Content.objects.filter(pk__in=[pk for _, pk, _ in deletes]).delete()
+
+            contents_bulk_saved.send(sender=Content, created=created, updated=updated, update_fields=update_fields)
+
+        results = [{"index": index, "op": "create", "id": content.pk} for (index, _, _), content in zip(creates, created)]
+        results += [{"index": index, "op": "update", "id": pk} for index, pk, _ in updates]
+        results += [{"index": index, "op": "delete", "id": pk} for index, pk, _ in deletes]
+        return Response({"results": sorted(results, key=lambda result: result["index"])})
+
+
+class ContentChangesView(APIView):
+    """
+    Change feed for delta sync (see `content.changes`).
+    - `?since=` is the `cursor` of the previous response (or an ISO 8601
+      `updated_at`); without it, everything the user may see is sent.
+    - Returns the `changed` items, the `deleted` ids (apply those first), the
+      `cursor` to pass next time and whether `has_more` pages follow.
+    - Same scoping as the list: staff get every change, authors their own.
+    - `?limit=` items per page (default 100, at most 1000); `?fields=`/`?exclude=` as on the list.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        fields = get_fieldset(request)
+        rows, deleted, cursor, has_more = get_changes(
+            request.user, request.query_params.get('since'), ContentRowSerializer.columns(fields), get_limit(request),
+        )
+        with timed('serialize'):
+            changed = ContentRowSerializer(rows, fields=fields).data
+        return Response({"changed": changed, "deleted": deleted, "cursor": cursor, "has_more": has_more})
+
+
+class ContentStatsView(APIView):
+    """
+    Per-author and per-category content counts for the admin dashboard.
+    - Staff only.
+    - Read from the incrementally maintained statistics tables (see
+      `content.stats`), so the cost doesn't grow with the Content table.
+    - Authors are listed by latest activity, categories by content count;
+      `?limit=` caps both lists (default 100, at most 1000).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        limit = get_limit(request)
+        totals = stats.get_totals()
+        authors = AuthorStats.objects.filter(content_count__gt=0)
+        author_rows = authors.order_by('-last_updated_at', 'author_id').values(
+            'author_id', 'author__email', 'author__full_name', 'content_count', 'document_count',
+            'last_created_at', 'last_updated_at',
+        )[:limit]
+        category_rows = CategoryStats.objects.filter(content_count__gt=0).order_by(
+            '-content_count', 'category__name',
+        ).values('category__name', 'content_count')[:limit]
+        return Response({
+            "totals": {
+                "authors": totals['author_count'], "contents": totals['content_count'],
+                "documents": totals['document_count'],
+            },
+            "authors": [
+                {
+                    "author": row['author_id'], "email": row['author__email'], "full_name": row['author__full_name'],
+                    "content_count": row['content_count'], "document_count": row['document_count'],
+                    "last_created_at": row['last_created_at'], "last_updated_at": row['last_updated_at'],
+                }
+                for row in author_rows
+            ],
+            "categories": [{"name": row['category__name'], "count": row['content_count']} for row in category_rows],
+        })
@@ -0,0 +1,71 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from cms_project.metrics import timed
+from . import cache as user_cache
+from .models import ClaimsUser, User
+from .tokens import USER_CLAIMS
+
+
+def user_id_from_token(validated_token):
+    try:
+        return validated_token[api_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken(_('Token contained no recognizable user identification'))
+
+
+def user_from_claims(validated_token):
+    """
+    A ClaimsUser for tokens carrying the USER_CLAIMS, else None.
+    """
+    if not all(claim in validated_token for claim in USER_CLAIMS):
+        return None
+    if not validated_token['is_active']:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    return ClaimsUser.from_claims(user_id_from_token(validated_token), validated_token)
+
+
+def check_user(user):
+    if not user.is_active:
+        raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without a per-request user query.
+    - Tokens from `CMSRefreshToken` authenticate as a `ClaimsUser`.
+    - Older tokens load the full user through the in-process user cache.
+    """
+
+    def authenticate(self, request):
+        with timed('auth'):
+            return super().authenticate(request)
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Revocation compares the password hash, which needs the real row
+            return super().get_user(validated_token)
+        user = user_from_claims(validated_token)
+        if user is not None:
+            return user
+        try:
+            user = user_cache.get_user(user_id_from_token(validated_token))
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        return check_user(user)
+
+    async def aget_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            from asgiref.sync import sync_to_async
+            return await sync_to_async(super().get_user)(validated_token)
+        user = user_from_claims(validated_token)
+        if user is not None:
+            return user
+        try:
+            user = await user_cache.aget_user(user_id_from_token(validated_token))
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        return check_user(user)
@@ -0,0 +1,94 @@
+"""
+In-process membership filter for blacklisted refresh tokens.
+
+Every refresh checks its token against the blacklist. Instead of one query
+per check, each process keeps a bloom filter of the jtis of unexpired
+blacklisted tokens, rebuilt every TOKEN_BLACKLIST_FILTER_INTERVAL seconds.
+A miss means "not blacklisted" without touching the database; a hit (a real
+entry or a ~1% false positive) is confirmed with the usual query. Tokens
+blacklisted by this process are added at once. One blacklisted by another
+process can pass here until the next rebuild, so keep the interval short,
+or set it to 0 to always query.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+FALSE_POSITIVE_RATE = 0.01
+MIN_CAPACITY = 1024
+
+_filter = None
+_built_at = 0.0
+_lock = threading.Lock()
+
+
+class BloomFilter:
+
+    def __init__(self, capacity, error_rate=FALSE_POSITIVE_RATE):
+        capacity = max(capacity, MIN_CAPACITY)
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        # Double hashing: k positions from two 64-bit halves of one digest.
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+def get_interval():
+    return getattr(settings, 'TOKEN_BLACKLIST_FILTER_INTERVAL', 30)
+
+
+def build_filter():
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+    # Expired tokens fail verification anyway, so they need no entry.
+    jtis = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now()).values_list('token__jti', flat=True)
+    jtis = list(jtis.iterator())
+    bloom = BloomFilter(len(jtis) * 2)  # Headroom for tokens blacklisted until the next rebuild
+    for jti in jtis:
+        bloom.add(jti)
+    return bloom
+
+
+def get_filter():
+    global _filter, _built_at
+    with _lock:
+        if _filter is None or time.monotonic() - _built_at > get_interval():
+            _filter = build_filter()
+            _built_at = time.monotonic()
+        return _filter
+
+
+def might_be_blacklisted(jti):
+    """
+    False when `jti` is certainly not blacklisted (as of the last rebuild).
+    """
+    if not get_interval():
+        return True
+    return jti in get_filter()
+
+
+def add(jti):
+    with _lock:
+        if _filter is not None:
+            _filter.add(jti)
+
+
+def reset():
+    global _filter
+    with _lock:
+        _filter = None
@@ -0,0 +1,89 @@
+"""
+In-process LRU cache of `User` rows, keyed by primary key.
+
+Authentication and views that need the full user row read it from here
+instead of querying the database on every request. Entries are dropped when
+the user is saved or deleted in this process (see the receivers in
+`users.models`) and expire after USER_CACHE_TIMEOUT seconds, which bounds how
+long another process can serve a stale row. Writes through `QuerySet.update()`
+bypass the signals and are only picked up on expiry.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+_entries = OrderedDict()  # pk -> (expires_at, user)
+_lock = threading.Lock()
+
+
+def get_max_size():
+    return getattr(settings, 'USER_CACHE_SIZE', 1024)
+
+
+def get_timeout():
+    return getattr(settings, 'USER_CACHE_TIMEOUT', 60)
+
+
+def get(pk):
+    """
+    A private copy of the cached user `pk`, or None on a miss.
+    """
+    with _lock:
+        entry = _entries.get(pk)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _entries[pk]
+            return None
+        _entries.move_to_end(pk)
+        user = entry[1]
+    # Callers may modify their instance; the cached one stays untouched.
+    return copy.copy(user)
+
+
+def put(user):
+    max_size = get_max_size()
+    if not max_size or not get_timeout():
+        return
+    user = copy.copy(user)
+    with _lock:
+        _entries[user.pk] = (time.monotonic() + get_timeout(), user)
+        _entries.move_to_end(user.pk)
+        while len(_entries) > max_size:
+            _entries.popitem(last=False)
+
+
+def invalidate(pk):
+    with _lock:
+        _entries.pop(pk, None)
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def get_user(pk):
+    """
+    The user `pk`, from the cache or the database. Raises User.DoesNotExist.
+    """
+    from .models import User
+    pk = User._meta.pk.to_python(pk)  # Token claims may carry it as a string
+    user = get(pk)
+    if user is None:
+        user = User.objects.get(pk=pk)
+        put(user)
+    return user
+
+
+async def aget_user(pk):
+    from .models import User
+    pk = User._meta.pk.to_python(pk)
+    user = get(pk)
+    if user is None:
+        user = await User.objects.aget(pk=pk)
+        put(user)
+    return user
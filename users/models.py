@@ -2,7 +2,11 @@
 
 # Create your models here.
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
-from django.db import models
+from django.db import models, router
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache as user_cache
 
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -51,3 +55,40 @@ class User(AbstractBaseUser, PermissionsMixin):
         return self.email
 
 
+
+class ClaimsUser(User):
+    """
+    A user built from access-token claims without a database query.
+    Only the primary key and the USER_CLAIMS flags are loaded; reading any
+    other field fetches the full row through the in-process user cache.
+    It is read-only: load the real `User` to make changes.
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_claims(cls, user_id, claims):
+        from .tokens import USER_CLAIMS
+        field_names = ['id', *USER_CLAIMS]
+        # The claim is a string in tokens from newer simplejwt releases; compare like a loaded pk
+        values = [User._meta.pk.to_python(user_id), *(claims[claim] for claim in USER_CLAIMS)]
+        return cls.from_db(router.db_for_read(User), field_names, values)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        full = user_cache.get_user(self.pk)
+        deferred = self.get_deferred_fields()
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred or (fields and field.attname in fields):
+                setattr(self, field.attname, getattr(full, field.attname))
+
+    def save(self, *args, **kwargs):
+        raise TypeError('ClaimsUser is read-only; load the User row to save changes.')
+
+    def delete(self, *args, **kwargs):
+        raise TypeError('ClaimsUser is read-only; load the User row to delete it.')
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
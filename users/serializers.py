@@ -1,5 +1,10 @@
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from users import cache as user_cache
 from users.models import User
+from users.tokens import CMSRefreshToken
 import re
 
 
@@ -53,3 +58,32 @@ class UserSerializer(serializers.ModelSerializer):
         if not re.search(r'[!@#$%^&*(),.?\":{}|<>]', value):
             raise serializers.ValidationError("Password must contain at least one special character.")
         return value
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """
+    Refresh with `CMSRefreshToken`: the user row comes from the user cache and
+    the role claims are re-read from it, so role changes reach new tokens.
+    """
+    token_class = CMSRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        try:
+            user = user_cache.get_user(refresh.payload.get(jwt_settings.USER_ID_CLAIM))
+        except User.DoesNotExist:
+            user = None
+        if user is None or not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        refresh.set_user_claims(user)
+
+        data = {'access': str(refresh.access_token)}
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()  # So the rotated token can be blacklisted in turn
+            data['refresh'] = str(refresh)
+        return data
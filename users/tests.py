@@ -48,4 +48,163 @@ class UserTests(APITestCase):
             "password": "Password@123"
         }
         response = self.client.post(self.login_url, login_data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class ClaimsAuthenticationTests(APITestCase):
+    def setUp(self):
+        from users import cache as user_cache
+        from users.models import User
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            email="author@example.com",
+            password="Password@123",
+            full_name="Author User",
+            phone="1234567890",
+            pincode="123456",
+            is_author=True
+        )
+
+    def login(self):
+        response = self.client.post('/api/users/login/', {"email": self.user.email, "password": "Password@123"}, format='json')
+        return response.data["access"]
+
+    def test_token_carries_role_claims(self):
+        """ Test that login tokens carry the role flags. """
+        from rest_framework_simplejwt.tokens import AccessToken
+        token = AccessToken(self.login())
+        self.assertEqual((token["is_staff"], token["is_author"], token["is_active"]), (False, True, True))
+
+    def test_requests_do_not_query_users(self):
+        """ Test that authenticating with a claims token runs no user query. """
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()}")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/content/', {
+                "title": "Mine", "body": "Body", "summary": "Summary", "categories": "Art",
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse([q["sql"] for q in queries if '"users_user"' in q["sql"]])
+        self.assertEqual(response.data["author"], self.user.id)
+
+    def test_claims_user_reads_own_content(self):
+        """ Test that a login token's user owns their content, whatever type the id claim has. """
+        from content.models import Content
+        from users.models import ClaimsUser
+        content = Content.objects.create(author=self.user, title="Mine", body="Body", summary="Summary", categories="Art")
+        self.assertEqual(ClaimsUser.from_claims(str(self.user.pk), {"is_staff": False, "is_author": True,
+                                                                     "is_active": True}).pk, self.user.pk)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()}")
+        response = self.client.get(f'/api/content/{content.id}/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["author"], self.user.id)
+
+    def test_inactive_claim_is_rejected(self):
+        """ Test that a token issued to an inactive user is refused. """
+        from users.tokens import CMSRefreshToken
+        self.user.is_active = False
+        token = CMSRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get('/api/content/')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_claims_user_loads_other_fields_through_cache(self):
+        """ Test that a claims user fetches the full row once and refuses to save. """
+        from users.models import ClaimsUser
+        claims = {"is_staff": False, "is_author": True, "is_active": True}
+        with self.assertNumQueries(1):
+            first = ClaimsUser.from_claims(self.user.id, claims)
+            self.assertEqual(first.email, self.user.email)
+            second = ClaimsUser.from_claims(self.user.id, claims)
+            self.assertEqual(second.full_name, "Author User")
+        with self.assertRaises(TypeError):
+            first.save()
+
+    def test_user_save_invalidates_cache(self):
+        """ Test that saving a user drops its cached row. """
+        from users import cache as user_cache
+        self.assertEqual(user_cache.get_user(self.user.id).full_name, "Author User")
+        self.user.full_name = "Renamed"
+        self.user.save()
+        self.assertEqual(user_cache.get_user(self.user.id).full_name, "Renamed")
+
+
+class RefreshTokenTests(APITestCase):
+    def setUp(self):
+        from users import blacklist, cache as user_cache
+        from users.models import User
+        blacklist.reset()
+        user_cache.clear()
+        self.refresh_url = '/api/users/token/refresh/'
+        self.user = User.objects.create_user(
+            email="author@example.com",
+            password="Password@123",
+            full_name="Author User",
+            phone="1234567890",
+            pincode="123456",
+            is_author=True
+        )
+        response = self.client.post('/api/users/login/', {"email": self.user.email, "password": "Password@123"}, format='json')
+        self.refresh = response.data["refresh"]
+
+    def test_rotated_token_cannot_be_reused(self):
+        """ Test that a refresh token is blacklisted once rotated. """
+        response = self.client.post(self.refresh_url, {"refresh": self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("refresh", response.data)
+        response = self.client.post(self.refresh_url, {"refresh": self.refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rotated_token_is_outstanding(self):
+        """ Test that the token a refresh issues is recorded, so it can be blacklisted in turn. """
+        from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+        rotated = self.client.post(self.refresh_url, {"refresh": self.refresh}, format='json').data["refresh"]
+        self.assertTrue(OutstandingToken.objects.filter(token=rotated, user=self.user).exists())
+        response = self.client.post(self.refresh_url, {"refresh": rotated}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(self.refresh_url, {"refresh": rotated}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_picks_up_role_changes(self):
+        """ Test that new access tokens carry the user's current role flags. """
+        from rest_framework_simplejwt.tokens import AccessToken
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.post(self.refresh_url, {"refresh": self.refresh}, format='json')
+        self.assertTrue(AccessToken(response.data["access"])["is_staff"])
+
+    def test_unblacklisted_tokens_skip_the_database(self):
+        """ Test that the filter answers for tokens that are not blacklisted. """
+        from users import blacklist
+        from users.tokens import CMSRefreshToken
+        token = CMSRefreshToken(self.refresh)
+        blacklist.get_filter()
+        with self.assertNumQueries(0):
+            token.check_blacklist()
+
+    def test_filter_sees_tokens_blacklisted_elsewhere(self):
+        """ Test that a rebuilt filter catches tokens blacklisted by another process. """
+        from rest_framework_simplejwt.exceptions import TokenError
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+        from users import blacklist
+        from users.tokens import CMSRefreshToken
+        token = CMSRefreshToken(self.refresh)
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token["jti"]))
+        blacklist.reset()
+        with self.assertRaises(TokenError):
+            token.check_blacklist()
+
+    def test_prune_tokens_deletes_only_expired(self):
+        """ Test that pruning removes expired tokens and their blacklist entries. """
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+        from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+        past = timezone.now() - timedelta(days=1)
+        for i in range(5):
+            expired = OutstandingToken.objects.create(user=self.user, jti=f"old-{i}", token="x", expires_at=past)
+            BlacklistedToken.objects.create(token=expired)
+        call_command("prune_tokens", batch_size=2, stdout=StringIO())
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
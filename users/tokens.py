@@ -0,0 +1,39 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import blacklist as blacklist_filter
+
+# User fields copied into every token, so authentication needs no DB query
+USER_CLAIMS = ('is_staff', 'is_author', 'is_active')
+
+
+class CMSRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the user's role flags. Access tokens made from it
+    copy the claims, so a role change shows up in new tokens only, at most
+    ACCESS_TOKEN_LIFETIME after it is made.
+    Blacklist checks go through the in-process filter in `users.blacklist`.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_user_claims(user)
+        return token
+
+    def set_user_claims(self, user):
+        for claim in USER_CLAIMS:
+            self[claim] = getattr(user, claim)
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if blacklist_filter.might_be_blacklisted(jti) and BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
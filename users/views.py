@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from users.models import User
 from users.serializers import UserSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
+from users.tokens import CMSRefreshToken
 from django.core.exceptions import ValidationError
 
 
@@ -72,8 +72,8 @@ class LoginView(APIView):
             print("Password Check Failed")  # Debugging
             return Response({"detail": "Incorrect password"}, status=status.HTTP_401_UNAUTHORIZED)
 
-        # Generate JWT tokens for the authenticated user
-        refresh = RefreshToken.for_user(user)
+        # Generate JWT tokens for the authenticated user (role flags travel as claims)
+        refresh = CMSRefreshToken.for_user(user)
 
         return Response({
             'refresh': str(refresh),